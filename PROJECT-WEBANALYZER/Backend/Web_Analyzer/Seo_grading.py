@@ -1,73 +1,35 @@
-from bs4 import BeautifulSoup
+from page_features import as_features
 from sklearn.feature_extraction.text import TfidfVectorizer
 from sklearn.metrics.pairwise import cosine_similarity
-import requests
 from urllib.parse import urlparse
+# Kept out of this module so the server can check robots.txt without loading sklearn
+from robots_status import check_robots_txt, is_valid_robots_content
 
 def get_base_url(url):
     parsed_url = urlparse(url)
     base_url = f"{parsed_url.scheme}://{parsed_url.netloc}"
     return base_url
 
-def is_valid_robots_content(content):
-    # Basic validation for common robots.txt lines (User-agent, Disallow, Allow, Sitemap)
-    lines = content.splitlines()
-    for line in lines:
-        if line.strip().startswith(("User-agent", "Disallow", "Allow", "Sitemap", "Crawl-delay", "Host")):
-            return True
-    return False
-
-def check_robots_txt(base_url):
-    robots_url = base_url + "/robots.txt"
-
-    headers = {
-        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/58.0.3029.110 Safari/537.3'
-    }
-
-    try:
-        # Send request with a User-Agent header to mimic a browser
-        response = requests.get(robots_url, headers=headers, allow_redirects=True)
-
-        # Check if the status code is 200 (OK)
-        if response.status_code == 200:
-            # Check if the content of the robots.txt follows standard patterns
-            if is_valid_robots_content(response.text):
-                return True
-            else:
-                return False  # Not a valid robots.txt format
-        elif response.status_code == 404:
-            return "robots.txt file not found"
-        elif response.status_code == 403:
-            return "access to robots.txt is forbidden"
-        elif response.status_code == 529:
-            return "server error"
-        else:
-            return f"unexpected status code: {response.status_code}"
-    except requests.RequestException as e:
-        return f"Error checking robots.txt: {e}"
-
-def get_website_info(html_content):
-    # Parse the HTML content
-    soup = BeautifulSoup(html_content, 'html.parser')
+def get_website_info(document):
+    # Accepts raw HTML, a parsed tree or a page feature record
+    features = as_features(document)
 
     # Extract the title
-    title = soup.title.string if soup.title else 'No title found'
+    title = features["title"] if features["title"] is not None else 'No title found'
 
-    # Extract all headings (h1, h2, h3, etc.)
-    headings = []
-    for level in range(1, 7):  # h1 to h6
-        for heading in soup.find_all(f'h{level}'):
-            headings.append(heading.text.strip())
+    # Headings in h1..h6 order
+    headings = list(features["headings"])
 
     return title, headings
 
-def calculate_cosine_similarity(query, title, headings):
+def calculate_cosine_similarity(query, title, headings, vectorizer=None):
     # Combine the query, title, and headings into a single list
     documents = [query, title] + headings
 
-    # Use TfidfVectorizer to convert the text to vectors
-    vectorizer = TfidfVectorizer().fit_transform(documents)
-    vectors = vectorizer.toarray()
+    # Use TfidfVectorizer to convert the text to vectors; IDF weights come from this
+    # page's documents, so a vectorizer passed in is refitted on every call
+    vectorizer = vectorizer if vectorizer is not None else TfidfVectorizer()
+    vectors = vectorizer.fit_transform(documents).toarray()
 
     # Compute cosine similarity between the query and the title/headings
     query_vector = vectors[0]  # First vector is the query
@@ -80,31 +42,34 @@ def calculate_cosine_similarity(query, title, headings):
 
     return title_similarity, heading_similarities
 
-def seo_grading(html_content, base_url, query=None):
-    soup = BeautifulSoup(html_content, 'html.parser')
-    query = query if query else soup.title.string if soup.title else 'No query provided'
+def seo_grading(document, base_url, query=None, robots_txt_status=None, vectorizer=None):
+    # Every step reads the page feature record (stored at scrape time or built here once)
+    features = as_features(document)
+    query = query if query else features["title"] if features["title"] is not None else 'No query provided'
 
     # Extract title and headings
-    title, headings = get_website_info(html_content)
+    title, headings = get_website_info(features)
 
     # Calculate cosine similarities
-    title_similarity, heading_similarities = calculate_cosine_similarity(query, title, headings)
+    title_similarity, heading_similarities = calculate_cosine_similarity(query, title, headings, vectorizer)
 
-    # Check robots.txt status
-    robots_txt_status = check_robots_txt(base_url)
+    # Check robots.txt status, unless the caller already fetched it
+    if robots_txt_status is None:
+        robots_txt_status = check_robots_txt(base_url)
 
     # Extract meta tags
-    meta_description = soup.find('meta', attrs={'name': 'description'})
-    meta_keywords = soup.find('meta', attrs={'name': 'keywords'})
+    meta_description = 'description' in features["meta"]
+    meta_keywords = 'keywords' in features["meta"]
 
     # Count images and alt text coverage
-    images = soup.find_all('img')
-    images_with_alt = [img for img in images if img.get('alt')]
+    images = features["images"]
+    images_with_alt = [img for img in images if img['alt']]
 
     # Count internal and external links
-    links = soup.find_all('a', href=True)
-    internal_links = [link for link in links if urlparse(link['href']).netloc == urlparse(base_url).netloc]
-    external_links = [link for link in links if urlparse(link['href']).netloc != urlparse(base_url).netloc]
+    links = features["links"]
+    base_netloc = urlparse(base_url).netloc
+    internal_links = [link for link in links if urlparse(link).netloc == base_netloc]
+    external_links = [link for link in links if urlparse(link).netloc != base_netloc]
 
     # Numerical Details
     numerical_data = {
@@ -180,7 +145,7 @@ def seo_grading(html_content, base_url, query=None):
         "numerical_data": numerical_data,
         "one_liner_data": one_liner_data,
         "robots_txt_status": robots_txt_status,
-        "meta_description": meta_description["content"] if meta_description else None,
-        "meta_keywords": meta_keywords["content"] if meta_keywords else None
+        "meta_description": features["meta"].get('description'),
+        "meta_keywords": features["meta"].get('keywords')
     }
 
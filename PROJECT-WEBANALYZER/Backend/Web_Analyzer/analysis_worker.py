@@ -0,0 +1,114 @@
+import json
+import logging
+import os
+import zlib
+
+# Code that runs inside the analysis process pool (see executor.run_cpu).
+# init_worker loads the heavy models once per process; the task functions
+# below take their inputs as zlib-compressed UTF-8 bytes, which pickle to a
+# fraction of the size of the equivalent Python objects. Analyzer modules are
+# imported inside the functions so the server process, which only encodes
+# inputs, never loads spaCy or sklearn.
+
+_ad_topic_mapping = None
+_vectorizer = None  # TfidfVectorizer reused by every SEO task of this worker
+
+
+def encode_text(text):
+    return zlib.compress((text or "").encode("utf-8"), 1)
+
+
+def decode_text(data):
+    return zlib.decompress(data).decode("utf-8")
+
+
+def encode_json(value):
+    return encode_text(json.dumps(value))
+
+
+def decode_json(data):
+    return json.loads(decode_text(data))
+
+
+def init_worker():
+    """Process pool initializer: import and warm every model a task may need
+
+    A model that fails to load (e.g. the spaCy model is not installed) is
+    logged and re-raised, which breaks the pool: the server fails on startup
+    (or on the first analysis) instead of starting workers that fail every
+    task needing the model.
+    """
+    global _ad_topic_mapping
+
+    from ads_data import ad_topic_mapping
+    _ad_topic_mapping = ad_topic_mapping
+
+    # First calls pay for lazy loading (TextBlob lexicons, sklearn internals, parser backend)
+    _warm("ads_recommendation", _warm_ads)
+    _warm("Seo_grading", _warm_seo)
+    _warm("html_parsing", _warm_parser)
+
+
+def _warm(name, warm):
+    try:
+        warm()
+    except Exception:
+        logging.exception("Analysis worker could not load %s", name)
+        raise
+
+
+def _warm_ads():
+    # spaCy en_core_web_sm is loaded when ads_recommendation is imported
+    import ads_recommendation
+    ads_recommendation.extract_keywords("warm up the analysis worker")
+    ads_recommendation.sentiment_analysis("warm up the analysis worker")
+
+
+def _warm_seo():
+    global _vectorizer
+    from sklearn.feature_extraction.text import TfidfVectorizer
+    from Seo_grading import calculate_cosine_similarity
+    _vectorizer = TfidfVectorizer()
+    calculate_cosine_similarity("analysis", "analysis worker", ["worker"], _vectorizer)
+
+
+def _warm_parser():
+    from html_parsing import make_soup
+    make_soup("<html><body><p>warm</p></body></html>")
+
+
+def ping():
+    # Used to start every worker (and run init_worker) before the first request
+    return os.getpid()
+
+
+def css_cache_stats():
+    # Each worker parses CSS into its own in-memory cache tier
+    from css_cache import parsed_css_cache
+    return os.getpid(), parsed_css_cache.stats()
+
+
+def ads_report(body_content):
+    from ads_recommendation import generate_text_report
+    return generate_text_report(decode_text(body_content), _ad_topic_mapping)
+
+
+def seo_report(features, base_url, query, robots_txt_status):
+    # robots.txt is fetched by the caller on the I/O pool; this process only computes
+    from Seo_grading import seo_grading
+    return seo_grading(decode_json(features), base_url, query, robots_txt_status, _vectorizer)
+
+
+def responsive_report(features, css_content):
+    from responsive import responsive
+    return responsive(decode_json(features), decode_json(css_content))
+
+
+def color_report(elements_properties):
+    from colorgrading import color_grading_report
+    return color_grading_report(decode_json(elements_properties))
+
+
+def css_js_files(html_content, base_url):
+    from methods import extract_css_js_files, parse_html
+    return extract_css_js_files(parse_html(decode_text(html_content)), base_url)
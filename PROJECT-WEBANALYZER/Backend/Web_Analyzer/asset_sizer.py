@@ -0,0 +1,146 @@
+import asyncio
+import urllib.parse
+import zlib
+from collections import defaultdict
+from typing import Dict, List
+
+import aiohttp
+
+import config
+import http_client
+
+try:
+    import brotli
+except ImportError:  # Optional: without it servers are not offered br
+    brotli = None
+
+DECODE_ERRORS = (zlib.error,) if brotli is None else (zlib.error, brotli.error)
+
+CHUNK_SIZE = 64 * 1024
+ACCEPT_ENCODING = "gzip, deflate, br" if brotli is not None else "gzip, deflate"
+
+
+class _Decoder:
+    """Counts decoded bytes of a compressed body chunk by chunk without keeping them
+
+    Call ``finish`` once the body has ended: zlib may still hold the tail of
+    the stream, which only comes out on flush.
+    """
+
+    def __init__(self, encoding: str):
+        self.encoding = encoding
+        self.size = 0
+        if encoding in ("", "identity"):
+            self._decompressor = None
+        elif encoding in ("gzip", "x-gzip"):
+            self._decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+        elif encoding == "deflate":
+            self._decompressor = zlib.decompressobj()
+        elif encoding == "br" and brotli is not None:
+            self._decompressor = brotli.Decompressor()
+        else:
+            raise ValueError(f"unsupported content encoding: {encoding}")
+
+    def feed(self, chunk: bytes):
+        if self._decompressor is None:
+            self.size += len(chunk)
+        elif self.encoding == "br":
+            self.size += len(self._decompressor.process(chunk))
+        else:
+            self.size += len(self._decompressor.decompress(chunk))
+
+    def finish(self) -> int:
+        # brotli returns everything it can decode from process(); there is nothing to flush
+        if self._decompressor is not None and self.encoding != "br":
+            self.size += len(self._decompressor.flush())
+        return self.size
+
+
+class AssetSizer:
+    """Measures subresources concurrently over the shared connection pool
+
+    Bodies are streamed and only counted, so memory stays flat however large
+    the files are. Each result carries the bytes on the wire (transfer size)
+    and after content decoding (decoded size), plus the caching and
+    compression headers the performance report needs.
+
+    Args:
+        max_concurrency (int): Maximum downloads in flight across all hosts
+        per_host (int): Maximum downloads in flight to a single host
+        timeout (float): Per-request timeout in seconds
+    """
+
+    def __init__(
+        self,
+        max_concurrency: int = config.ASSET_SIZE_CONCURRENCY,
+        per_host: int = config.ASSET_SIZE_PER_HOST,
+        timeout: float = config.ASSET_SIZE_TIMEOUT,
+    ):
+        self.max_concurrency = max_concurrency
+        self.per_host = per_host
+        self.timeout = timeout
+
+    async def size_all(self, urls: List[str]) -> List[Dict[str, object]]:
+        """Sizes every URL
+
+        Args:
+            urls (list[str]): Absolute asset URLs
+
+        Returns:
+            list[dict]: ``{"url", "status", "transfer_size", "decoded_size",
+                        "content_type", "content_encoding", "cache_control",
+                        "expires", "etag", "last_modified", "error"}`` per URL,
+                        in the order given
+        """
+        # Limits belong to this call; overlapping calls on one sizer each get their own
+        slots = (asyncio.Semaphore(self.max_concurrency), defaultdict(lambda: asyncio.Semaphore(self.per_host)))
+        return await asyncio.gather(*(self._size(slots, url) for url in urls))
+
+    async def _size(self, slots: tuple, url: str) -> Dict[str, object]:
+        result = {
+            "url": url, "status": None, "transfer_size": 0, "decoded_size": 0,
+            "content_type": None, "content_encoding": None, "cache_control": None,
+            "expires": None, "etag": None, "last_modified": None, "error": None,
+        }
+        global_slots, host_slots = slots
+        host = urllib.parse.urlparse(url).netloc
+        try:
+            async with global_slots, host_slots[host]:
+                async with http_client.request(
+                    "GET",
+                    url,
+                    headers={"Accept-Encoding": ACCEPT_ENCODING},
+                    auto_decompress=False,
+                    timeout=aiohttp.ClientTimeout(total=self.timeout),
+                ) as response:
+                    headers = response.headers
+                    encoding = headers.get("Content-Encoding", "").strip().lower()
+                    result.update(
+                        status=response.status,
+                        content_type=headers.get("Content-Type"),
+                        content_encoding=encoding or None,
+                        cache_control=headers.get("Cache-Control"),
+                        expires=headers.get("Expires"),
+                        etag=headers.get("ETag"),
+                        last_modified=headers.get("Last-Modified"),
+                    )
+                    if response.status != 200:
+                        return result
+                    try:
+                        decoder = _Decoder(encoding)
+                    except ValueError as e:
+                        decoder = None
+                        result["error"] = str(e)
+                    async for chunk in response.content.iter_chunked(CHUNK_SIZE):
+                        result["transfer_size"] += len(chunk)
+                        if decoder is not None:
+                            decoder.feed(chunk)
+                    result["decoded_size"] = decoder.finish() if decoder is not None else None
+        except (aiohttp.ClientError, asyncio.TimeoutError) + DECODE_ERRORS as e:
+            result["error"] = str(e) or type(e).__name__
+        return result
+
+
+def size_assets(urls: List[str], **sizer_kwargs) -> List[Dict[str, object]]:
+    """Synchronous wrapper around AssetSizer.size_all"""
+    return http_client.run_sync(AssetSizer(**sizer_kwargs).size_all(urls))
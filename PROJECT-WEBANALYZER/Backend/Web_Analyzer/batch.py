@@ -0,0 +1,101 @@
+import asyncio
+import time
+import urllib.parse
+from collections import defaultdict
+from typing import AsyncIterator, Awaitable, Callable, Dict, List
+
+import config
+from crawler import load_robots
+
+
+class SiteResources:
+    """What the pages of one site share during a batch
+
+    Attributes:
+        host (str): ``host[:port]`` of the site
+        stylesheets (dict): ``{url: result}`` of stylesheets already fetched,
+                            see StylesheetFetcher.fetch_all
+    """
+
+    def __init__(self, host: str):
+        self.host = host
+        self.stylesheets: Dict[str, dict] = {}
+        self._robots = None
+
+    async def robots(self, url: str):
+        # Fetched by the first page of the site; the others wait for the same task
+        if self._robots is None:
+            self._robots = asyncio.ensure_future(load_robots(url))
+        return await asyncio.shield(self._robots)
+
+
+class BatchAnalyzer:
+    """Analyzes many pages with a global and a per-host concurrency cap
+
+    Each page is handed to ``analyze_page(url, site)`` with the SiteResources
+    of its host, so stylesheets and robots.txt are fetched once per site.
+
+    Args:
+        analyze_page (callable): ``async analyze_page(url, site) -> dict``
+        max_concurrency (int): Pages analyzed at the same time
+        per_host (int): Pages of a single host analyzed at the same time
+        respect_robots (bool): Skip pages robots.txt disallows
+    """
+
+    def __init__(
+        self,
+        analyze_page: Callable[[str, SiteResources], Awaitable[Dict[str, object]]],
+        max_concurrency: int = config.BATCH_CONCURRENCY,
+        per_host: int = config.BATCH_PER_HOST,
+        respect_robots: bool = True,
+    ):
+        self.analyze_page = analyze_page
+        self.max_concurrency = max(1, max_concurrency)
+        self.per_host = max(1, per_host)
+        self.respect_robots = respect_robots
+
+    async def iter_run(self, urls: List[str]) -> AsyncIterator[Dict[str, object]]:
+        """Yields ``{"url", "status", "results", "errors", "elapsed_seconds"}`` per
+        distinct URL as each one finishes, then ``{"summary": {...}}``
+
+        ``status`` is "done", "error" or "disallowed". Pages still pending are
+        cancelled when the consumer stops early.
+        """
+        started = time.monotonic()
+        global_slots = asyncio.Semaphore(self.max_concurrency)
+        host_slots = defaultdict(lambda: asyncio.Semaphore(self.per_host))
+        sites = {}
+
+        async def run(url):
+            page_started = time.monotonic()
+            host = urllib.parse.urlsplit(url).netloc
+            site = sites.setdefault(host, SiteResources(host))
+            record = {"url": url, "status": "done", "results": {}, "errors": {}}
+            try:
+                if self.respect_robots:
+                    robots = await site.robots(url)
+                    if not robots.can_fetch(config.HTTP_USER_AGENT, url):
+                        return dict(record, status="disallowed", elapsed_seconds=0.0)
+                async with global_slots, host_slots[host]:
+                    page_started = time.monotonic()
+                    report = await self.analyze_page(url, site)
+                record.update(results=report["results"], errors=report["errors"])
+            except Exception as e:
+                record.update(status="error", errors={"page": str(e) or type(e).__name__})
+            record["elapsed_seconds"] = round(time.monotonic() - page_started, 3)
+            return record
+
+        summary = {"total": 0, "done": 0, "error": 0, "disallowed": 0, "sites": 0}
+        tasks = [asyncio.ensure_future(run(url)) for url in dict.fromkeys(urls)]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                record = await next_done
+                summary["total"] += 1
+                summary[record["status"]] += 1
+                yield record
+        finally:
+            for task in tasks:
+                task.cancel()
+        summary["sites"] = len(sites)
+        summary["elapsed_seconds"] = round(time.monotonic() - started, 3)
+        yield {"summary": summary}
@@ -0,0 +1,108 @@
+"""Load test: concurrent throughput against the execution pool size
+
+Usage:
+    python benchmarks/bench_executor.py [--requests N] [--sizes 1,2,4,8]
+    python benchmarks/bench_executor.py --url http://localhost:8000/seo_grading \\
+        --page https://example.com --requests 64 --concurrency 16
+
+Without --url, each pool size runs N concurrent "requests" through
+executor.run_io (a simulated 200 ms slow origin) and executor.run_cpu
+(a pure-Python CPU task). It prints requests per second for each size,
+and the per-pool queue depth seen along the way. Throughput on the I/O
+pool grows with its size, and on the CPU pool with cores up to the
+core count. With a single worker it stays at the serial rate.
+
+With --url, N requests are posted to a running server, at most
+--concurrency at a time, and the throughput and latency percentiles are
+printed. Start the server with different IO_POOL_SIZE / CPU_POOL_SIZE
+values to compare.
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import config
+import executor
+
+
+def slow_origin(seconds):
+    time.sleep(seconds)
+    return seconds
+
+
+def cpu_task(n):
+    total = 0
+    for i in range(n):
+        total += i * i % 7
+    return total
+
+
+async def run_pool(kind, size, requests):
+    executor.shutdown()
+    if kind == "io":
+        config.IO_POOL_SIZE = executor.io_metrics.workers = size
+        executor.io_metrics.peak_queued = 0
+        run, call = executor.run_io, (slow_origin, 0.2)
+    else:
+        config.CPU_POOL_SIZE = executor.cpu_metrics.workers = size
+        executor.cpu_metrics.peak_queued = 0
+        run, call = executor.run_cpu, (cpu_task, 3_000_000)
+        await run(*call)  # Start the worker processes outside the timing
+    start = time.perf_counter()
+    await asyncio.gather(*(run(*call) for _ in range(requests)))
+    elapsed = time.perf_counter() - start
+    return requests / elapsed, executor.pool_stats()[kind]["peak_queued"]
+
+
+async def local(args):
+    sizes = [int(size) for size in args.sizes.split(",")]
+    for kind in ("io", "cpu"):
+        print(f"{kind} pool ({args.requests} concurrent requests)")
+        baseline = None
+        for size in sizes:
+            throughput, peak_queued = await run_pool(kind, size, args.requests)
+            baseline = baseline or throughput
+            print(f"  size {size:>3}: {throughput:8.2f} req/s  x{throughput / baseline:5.2f}  peak queued {peak_queued}")
+    executor.shutdown()
+
+
+async def remote(args):
+    import aiohttp
+
+    slots = asyncio.Semaphore(args.concurrency)
+    latencies, failures = [], 0
+
+    async def one(session):
+        nonlocal failures
+        async with slots:
+            start = time.perf_counter()
+            async with session.post(args.url, json={"url": args.page}) as response:
+                await response.read()
+                if response.status != 200:
+                    failures += 1
+            latencies.append(time.perf_counter() - start)
+
+    timeout = aiohttp.ClientTimeout(total=None)
+    async with aiohttp.ClientSession(timeout=timeout) as session:
+        start = time.perf_counter()
+        await asyncio.gather(*(one(session) for _ in range(args.requests)))
+        elapsed = time.perf_counter() - start
+    latencies.sort()
+    print(f"{args.requests} requests, concurrency {args.concurrency}: {args.requests / elapsed:.2f} req/s, {failures} failed")
+    print(f"  p50 {statistics.median(latencies) * 1000:.0f} ms  p95 {latencies[int(len(latencies) * 0.95) - 1] * 1000:.0f} ms")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=32)
+    parser.add_argument("--sizes", default="1,2,4,8")
+    parser.add_argument("--url", help="Endpoint of a running server to load")
+    parser.add_argument("--page", default="https://example.com", help="Page URL posted to --url")
+    parser.add_argument("--concurrency", type=int, default=16)
+    args = parser.parse_args()
+    asyncio.run(remote(args) if args.url else local(args))
@@ -0,0 +1,81 @@
+"""Times the HTML parser backends and checks the analyzers agree across them
+
+Usage:
+    python benchmarks/bench_html_parsers.py URL [URL ...]
+
+Each page (and its stylesheets) is downloaded once. Then, for every
+installed backend, the HTML analyzers run over the same bytes. The script
+prints parse and analysis time per backend and any analyzer whose output
+differs from the html.parser baseline.
+"""
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import html_parsing
+import responsive
+import Seo_grading
+import web_security
+from html_parsing import make_soup
+from scraper import PageSnapshot, fetch_page_snapshot, find_properties
+
+BACKENDS = ["html.parser", "lxml", "html5lib"]
+PROPERTIES = [
+    'background-color', 'color', 'font-family', 'font-size', 'font-weight',
+    'margin', 'padding', 'text-align', 'justify-content', 'align-items'
+]
+
+
+def analyzers(snapshot):
+    html = snapshot.content
+    css_content = [sheet["css"] for sheet in snapshot.stylesheets if sheet["css"]]
+
+    def properties():
+        copy = PageSnapshot(snapshot.url, snapshot.final_url, snapshot.content, snapshot.headers, snapshot.status_code)
+        copy.stylesheets = snapshot.stylesheets
+        return find_properties(snapshot.url, PROPERTIES, snapshot=copy)
+
+    return {
+        "responsive": lambda: responsive.responsive(html, css_content),
+        "seo_title_headings": lambda: Seo_grading.get_website_info(html),
+        "security_payment_elements": lambda: web_security.scrape_payment_elements(html, snapshot.final_url),
+        "find_properties": properties,
+    }
+
+
+def run_backend(snapshot, backend):
+    html_parsing.set_parser(backend)
+    start = time.perf_counter()
+    make_soup(snapshot.content)
+    parse_seconds = time.perf_counter() - start
+
+    outputs, start = {}, time.perf_counter()
+    for name, analyzer in analyzers(snapshot).items():
+        try:
+            outputs[name] = json.loads(json.dumps(analyzer(), default=str))
+        except Exception as e:
+            outputs[name] = f"error: {e}"
+    return parse_seconds, time.perf_counter() - start, outputs
+
+
+def main(urls):
+    installed = [backend for backend in BACKENDS if html_parsing.resolve_parser(backend) == backend]
+    for url in urls:
+        snapshot = fetch_page_snapshot(url)
+        print(f"{url} ({len(snapshot.content):,} bytes)")
+        baseline = None
+        for backend in installed:
+            parse_seconds, analyze_seconds, outputs = run_backend(snapshot, backend)
+            baseline = baseline or outputs
+            drift = [name for name in outputs if outputs[name] != baseline[name]]
+            print(f"  {backend:<12} parse {parse_seconds:7.3f}s  analyzers {analyze_seconds:7.3f}s  "
+                  f"drift: {', '.join(drift) if drift else 'none'}")
+
+
+if __name__ == '__main__':
+    if len(sys.argv) < 2:
+        sys.exit(__doc__)
+    main(sys.argv[1:])
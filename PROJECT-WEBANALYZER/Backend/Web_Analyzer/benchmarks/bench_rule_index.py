@@ -0,0 +1,92 @@
+"""Compares the old linear selector scan with RuleIndex lookups in find_properties
+
+Usage:
+    python benchmarks/bench_rule_index.py [URL ...]
+
+With URLs, each page and its stylesheets are downloaded once and both
+matchers run over the same snapshot. Without URLs a synthetic page with
+5,000 elements and 8,000 rules is used.
+"""
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bs4 import BeautifulSoup
+
+from rule_index import RuleIndex
+from scraper import extract_css_from_webpage, fetch_page_snapshot, parse_css_rules
+
+PROPERTIES = [
+    'background-color', 'color', 'font-family', 'font-size', 'font-weight',
+    'margin', 'padding', 'text-align', 'justify-content', 'align-items'
+]
+
+
+def linear_scan(elements, css_rules):
+    # The matcher find_properties used before RuleIndex
+    for element in elements:
+        properties = {prop: None for prop in PROPERTIES}
+        for rule in css_rules:
+            if element.name in rule['selector']:
+                for prop in properties:
+                    if properties[prop] is None and prop in rule['properties']:
+                        properties[prop] = rule['properties'][prop]
+
+
+def indexed(elements, css_rules):
+    rule_index = RuleIndex(css_rules)
+    for element in elements:
+        properties = {prop: None for prop in PROPERTIES}
+        for rule in rule_index.matching_rules(element):
+            for prop in properties:
+                if properties[prop] is None and prop in rule['properties']:
+                    properties[prop] = rule['properties'][prop]
+
+
+def synthetic_page(n_elements=5000, n_rules=8000, seed=1):
+    rng = random.Random(seed)
+    tags = ['div', 'span', 'a', 'p', 'li', 'ul', 'section', 'button', 'img', 'h2']
+    classes = [f'c{i}' for i in range(400)]
+    body = ''.join(
+        f'<{t} class="{rng.choice(classes)} {rng.choice(classes)}" id="e{i}"></{t}>'
+        for i, t in ((i, rng.choice(tags)) for i in range(n_elements))
+    )
+    css = ''.join(
+        f'{rng.choice(tags)}.{rng.choice(classes)} .{rng.choice(classes)}{{color:#{i % 999:03d};margin:{i % 7}px}}'
+        for i in range(n_rules)
+    )
+    return BeautifulSoup(f'<html><body>{body}</body></html>', 'html.parser'), parse_css_rules(css)
+
+
+def real_page(url):
+    snapshot = fetch_page_snapshot(url)
+    external, style_tags, _ = extract_css_from_webpage(url, snapshot=snapshot)
+    css_rules = []
+    for css in external + [css for css in style_tags if css]:
+        css_rules.extend(parse_css_rules(css))
+    return snapshot.soup, css_rules
+
+
+def run(label, soup, css_rules):
+    elements = soup.find_all(True)
+    timings = {}
+    for name, matcher in (('linear scan', linear_scan), ('rule index', indexed)):
+        start = time.perf_counter()
+        matcher(elements, css_rules)
+        timings[name] = time.perf_counter() - start
+    speedup = timings['linear scan'] / timings['rule index'] if timings['rule index'] else float('inf')
+    print(f"{label}: {len(elements):,} elements x {len(css_rules):,} rules")
+    for name, seconds in timings.items():
+        print(f"  {name:<12} {seconds:8.3f}s")
+    print(f"  speedup      {speedup:8.1f}x")
+
+
+if __name__ == '__main__':
+    urls = sys.argv[1:]
+    if not urls:
+        run('synthetic', *synthetic_page())
+    for url in urls:
+        run(url, *real_page(url))
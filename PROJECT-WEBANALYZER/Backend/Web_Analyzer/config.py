@@ -0,0 +1,104 @@
+import json
+import os
+import tempfile
+
+# Runtime settings for the analyzer backend. Every value can be overridden
+# with an environment variable of the same name.
+
+
+def _env_int(name, default):
+    value = os.environ.get(name)
+    return int(value) if value else default
+
+
+def _env_float(name, default):
+    value = os.environ.get(name)
+    return float(value) if value else default
+
+
+# Stylesheet downloads
+STYLESHEET_FETCH_CONCURRENCY = _env_int("STYLESHEET_FETCH_CONCURRENCY", 16)
+STYLESHEET_FETCH_PER_HOST = _env_int("STYLESHEET_FETCH_PER_HOST", 6)
+STYLESHEET_FETCH_TIMEOUT = _env_float("STYLESHEET_FETCH_TIMEOUT", 10.0)
+STYLESHEET_MAX_IMPORT_DEPTH = _env_int("STYLESHEET_MAX_IMPORT_DEPTH", 5)
+
+# Shared outbound HTTP client
+HTTP_USER_AGENT = os.environ.get(
+    "HTTP_USER_AGENT",
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36",
+)
+HTTP_TIMEOUT = _env_float("HTTP_TIMEOUT", 10.0)
+HTTP_POOL_HOSTS = _env_int("HTTP_POOL_HOSTS", 32)
+HTTP_POOL_PER_HOST = _env_int("HTTP_POOL_PER_HOST", 10)
+HTTP_POOL_MAX = _env_int("HTTP_POOL_MAX", 100)
+HTTP_RETRIES = _env_int("HTTP_RETRIES", 2)
+HTTP_RETRY_BACKOFF = _env_float("HTTP_RETRY_BACKOFF", 0.5)
+
+# Freshness of cached scrapes. SCRAPE_DOMAIN_TTLS is a JSON object mapping a
+# domain (subdomains included) to its TTL in seconds, e.g. {"news.example.com": 3600}
+SCRAPE_TTL_SECONDS = _env_int("SCRAPE_TTL_SECONDS", 24 * 60 * 60)
+SCRAPE_DOMAIN_TTLS = json.loads(os.environ.get("SCRAPE_DOMAIN_TTLS") or "{}")
+
+# Parsed-stylesheet cache: in-process LRU bounded by the uncompressed JSON size of
+# its entries, backed by a disk store
+CSS_CACHE_MEMORY_BYTES = _env_int("CSS_CACHE_MEMORY_BYTES", 64 * 1024 * 1024)
+CSS_CACHE_DIR = os.environ.get("CSS_CACHE_DIR", os.path.join(tempfile.gettempdir(), "web_analyzer_css_cache"))
+
+# HTML parser backend for BeautifulSoup: "lxml", "html5lib" or "html.parser".
+# Falls back to html.parser when the configured backend is not installed.
+HTML_PARSER = os.environ.get("HTML_PARSER", "lxml")
+
+# Link checker: concurrency caps, per-request timeout and how long a link's
+# status is reused across pages and requests. Rate limiting and server errors
+# (429, 5xx, ...) are only reused for LINK_STATUS_TRANSIENT_TTL seconds.
+LINK_CHECK_CONCURRENCY = _env_int("LINK_CHECK_CONCURRENCY", 32)
+LINK_CHECK_PER_HOST = _env_int("LINK_CHECK_PER_HOST", 4)
+LINK_CHECK_TIMEOUT = _env_float("LINK_CHECK_TIMEOUT", 10.0)
+LINK_STATUS_TTL = _env_int("LINK_STATUS_TTL", 60 * 60)
+LINK_STATUS_TRANSIENT_TTL = _env_int("LINK_STATUS_TRANSIENT_TTL", 60)
+LINK_STATUS_CACHE_SIZE = _env_int("LINK_STATUS_CACHE_SIZE", 50000)
+
+# Site crawl mode. Seen URLs are kept exactly up to CRAWL_EXACT_SEEN_LIMIT,
+# then in a Bloom filter sized for CRAWL_BLOOM_CAPACITY URLs.
+CRAWL_MAX_DEPTH = _env_int("CRAWL_MAX_DEPTH", 2)
+CRAWL_DEPTH_LIMIT = _env_int("CRAWL_DEPTH_LIMIT", 10)  # Upper bound on any requested depth
+CRAWL_MAX_PAGES = _env_int("CRAWL_MAX_PAGES", 100)
+CRAWL_PAGE_LIMIT = _env_int("CRAWL_PAGE_LIMIT", 5000)  # Upper bound on any requested page budget
+CRAWL_CONCURRENCY = _env_int("CRAWL_CONCURRENCY", 4)
+CRAWL_EXACT_SEEN_LIMIT = _env_int("CRAWL_EXACT_SEEN_LIMIT", 50000)
+CRAWL_BLOOM_CAPACITY = _env_int("CRAWL_BLOOM_CAPACITY", 1000000)
+CRAWL_BLOOM_ERROR_RATE = _env_float("CRAWL_BLOOM_ERROR_RATE", 0.001)
+
+# Asset sizing (/evaluate_files, /webpage_performance)
+ASSET_SIZE_CONCURRENCY = _env_int("ASSET_SIZE_CONCURRENCY", 16)
+ASSET_SIZE_PER_HOST = _env_int("ASSET_SIZE_PER_HOST", 6)
+ASSET_SIZE_TIMEOUT = _env_float("ASSET_SIZE_TIMEOUT", 15.0)
+
+# Network model for /webpage_performance; the defaults approximate a slow 4G
+# mobile connection (150 ms RTT, 1.6 Mbps down, 6 connections per host)
+PERF_RTT_MS = _env_float("PERF_RTT_MS", 150.0)
+PERF_BANDWIDTH_KBPS = _env_float("PERF_BANDWIDTH_KBPS", 1600.0)
+PERF_CONNECTIONS_PER_HOST = _env_int("PERF_CONNECTIONS_PER_HOST", 6)
+
+# Execution layer: blocking I/O (DB, requests, bcrypt) runs on a thread pool,
+# CPU-heavy analysis on a process pool started with CPU_POOL_START_METHOD.
+# CPU_POOL_WARM_ON_STARTUP starts every analysis worker (loading spaCy and
+# friends) when the server starts instead of on the first request.
+IO_POOL_SIZE = _env_int("IO_POOL_SIZE", 32)
+CPU_POOL_SIZE = _env_int("CPU_POOL_SIZE", os.cpu_count() or 1)
+CPU_POOL_START_METHOD = os.environ.get("CPU_POOL_START_METHOD", "spawn")
+CPU_POOL_WARM_ON_STARTUP = os.environ.get("CPU_POOL_WARM_ON_STARTUP", "1") not in ("0", "false", "False")
+
+# Background analysis jobs (/jobs): jobs run JOB_WORKERS at a time on the
+# server's event loop and fail after JOB_TIMEOUT seconds
+JOB_WORKERS = _env_int("JOB_WORKERS", 2)
+JOB_TIMEOUT = _env_float("JOB_TIMEOUT", 600.0)
+
+# Batch analysis (/batch): URLs analyzed at once overall and per host.
+# TLS certificate probes are reused for SSL_PROBE_TTL seconds per domain, for
+# at most SSL_PROBE_CACHE_SIZE domains.
+BATCH_MAX_URLS = _env_int("BATCH_MAX_URLS", 1000)
+BATCH_CONCURRENCY = _env_int("BATCH_CONCURRENCY", 8)
+BATCH_PER_HOST = _env_int("BATCH_PER_HOST", 2)
+SSL_PROBE_TTL = _env_int("SSL_PROBE_TTL", 10 * 60)
+SSL_PROBE_CACHE_SIZE = _env_int("SSL_PROBE_CACHE_SIZE", 10000)
@@ -0,0 +1,250 @@
+import asyncio
+import hashlib
+import math
+import time
+import urllib.parse
+import urllib.robotparser
+from collections import defaultdict
+from typing import Callable, Dict, List, Optional
+
+import config
+import http_client
+from executor import run_io
+
+# Links to files the scraper cannot analyze are not queued
+SKIPPED_EXTENSIONS = (
+    ".pdf", ".zip", ".gz", ".rar", ".7z", ".exe", ".dmg", ".iso",
+    ".jpg", ".jpeg", ".png", ".gif", ".webp", ".avif", ".svg", ".ico", ".bmp",
+    ".mp3", ".mp4", ".avi", ".mov", ".webm", ".woff", ".woff2", ".ttf",
+    ".css", ".js", ".json", ".xml", ".rss",
+)
+
+
+class BloomFilter:
+    """Fixed-size probabilistic set: no false negatives, ``error_rate`` false positives
+
+    Args:
+        capacity (int): Number of items the filter is sized for
+        error_rate (float): False positive rate at ``capacity`` items
+    """
+
+    def __init__(self, capacity: int, error_rate: float):
+        self.size = max(8, math.ceil(-capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self.hash_count = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, item: str):
+        digest = hashlib.blake2b(item.encode("utf-8"), digest_size=16).digest()
+        first, second = int.from_bytes(digest[:8], "big"), int.from_bytes(digest[8:], "big")
+        for i in range(self.hash_count):
+            yield (first + i * second) % self.size
+
+    def add(self, item: str):
+        for position in self._positions(item):
+            self.bits[position >> 3] |= 1 << (position & 7)
+
+    def __contains__(self, item: str) -> bool:
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self._positions(item))
+
+
+class SeenUrls:
+    """Exact set of URLs that turns into a Bloom filter once it grows past ``exact_limit``
+
+    Small sites are deduplicated exactly; on very large ones memory stays
+    flat at the cost of occasionally skipping a page never visited.
+    """
+
+    def __init__(
+        self,
+        exact_limit: int = config.CRAWL_EXACT_SEEN_LIMIT,
+        bloom_capacity: int = config.CRAWL_BLOOM_CAPACITY,
+        bloom_error_rate: float = config.CRAWL_BLOOM_ERROR_RATE,
+    ):
+        self.exact_limit = exact_limit
+        self.bloom_capacity = bloom_capacity
+        self.bloom_error_rate = bloom_error_rate
+        self._exact = set()
+        self._bloom = None
+        self.count = 0
+
+    def add(self, url: str) -> bool:
+        """Records ``url``; returns False if it was (probably) seen before"""
+        if url in self:
+            return False
+        if self._bloom is None:
+            self._exact.add(url)
+            if len(self._exact) > self.exact_limit:
+                self._bloom = BloomFilter(max(self.bloom_capacity, len(self._exact)), self.bloom_error_rate)
+                for seen in self._exact:
+                    self._bloom.add(seen)
+                self._exact = set()
+        else:
+            self._bloom.add(url)
+        self.count += 1
+        return True
+
+    def __contains__(self, url: str) -> bool:
+        return url in self._bloom if self._bloom is not None else url in self._exact
+
+
+def normalize_url(url: str) -> str:
+    # One spelling per page: lowercase scheme/host, no default port, no fragment
+    parts = urllib.parse.urlsplit(url)
+    scheme = parts.scheme.lower()
+    host = (parts.hostname or "").lower()
+    port = parts.port
+    if port and not ((scheme == "http" and port == 80) or (scheme == "https" and port == 443)):
+        host = f"{host}:{port}"
+    return urllib.parse.urlunsplit((scheme, host, parts.path or "/", parts.query, ""))
+
+
+async def load_robots(base_url: str) -> urllib.robotparser.RobotFileParser:
+    """Fetches and parses robots.txt the way RobotFileParser.read does"""
+    robots = urllib.robotparser.RobotFileParser(urllib.parse.urljoin(base_url, "/robots.txt"))
+    try:
+        status, text = await http_client.async_get_text(robots.url)
+    except Exception:
+        status, text = None, ""
+    if status in (401, 403):
+        robots.disallow_all = True
+    elif status is not None and 200 <= status < 300:
+        robots.parse(text.splitlines())
+    else:
+        robots.allow_all = True
+    return robots
+
+
+class SiteCrawler:
+    """Breadth-first crawl of one site with depth and page budgets
+
+    Pages are handed to ``process_page`` (a blocking callable run on the
+    I/O pool) which stores the page and returns the hrefs found on it; links on
+    the same host are queued for the next depth. robots.txt rules and its
+    Crawl-delay / Request-rate are honoured.
+
+    Args:
+        start_url (str): Page the crawl starts from (depth 0)
+        process_page (callable): ``process_page(url) -> list[str]`` of hrefs
+        max_depth (int): Links deeper than this many hops are not followed,
+                         capped at CRAWL_DEPTH_LIMIT
+        max_pages (int): Maximum pages handed to ``process_page``
+        concurrency (int): Pages processed at the same time
+        respect_robots (bool): Skip pages robots.txt disallows
+    """
+
+    def __init__(
+        self,
+        start_url: str,
+        process_page: Callable[[str], List[str]],
+        max_depth: int = config.CRAWL_MAX_DEPTH,
+        max_pages: int = config.CRAWL_MAX_PAGES,
+        concurrency: int = config.CRAWL_CONCURRENCY,
+        respect_robots: bool = True,
+    ):
+        if not start_url.startswith(('http://', 'https://')):
+            start_url = 'https://' + start_url
+        self.start_url = normalize_url(start_url)
+        self.host = urllib.parse.urlsplit(self.start_url).netloc
+        self.process_page = process_page
+        self.max_depth = min(max_depth, config.CRAWL_DEPTH_LIMIT)
+        self.max_pages = min(max_pages, config.CRAWL_PAGE_LIMIT)
+        self.concurrency = max(1, concurrency)
+        self.respect_robots = respect_robots
+        self.seen = SeenUrls()
+        self.pages: List[Dict[str, object]] = []
+        self._started = 0
+        self._next_slot = defaultdict(float)
+        self._host_locks = defaultdict(asyncio.Lock)
+
+    def _is_internal(self, url: str) -> bool:
+        parts = urllib.parse.urlsplit(url)
+        return (
+            parts.scheme in ("http", "https")
+            and parts.netloc == self.host
+            and not parts.path.lower().endswith(SKIPPED_EXTENSIONS)
+        )
+
+    async def _wait_turn(self, url: str, delay: Optional[float]):
+        # Space out request starts to the host by the robots.txt delay
+        if not delay:
+            return
+        host = urllib.parse.urlsplit(url).netloc
+        async with self._host_locks[host]:
+            wait = self._next_slot[host] - time.monotonic()
+            if wait > 0:
+                await asyncio.sleep(wait)
+            self._next_slot[host] = time.monotonic() + delay
+
+    def _crawl_delay(self, robots) -> Optional[float]:
+        if robots is None:
+            return None
+        delay = robots.crawl_delay(config.HTTP_USER_AGENT)
+        if delay:
+            return float(delay)
+        rate = robots.request_rate(config.HTTP_USER_AGENT)
+        if rate and rate.requests:
+            return rate.seconds / rate.requests
+        return None
+
+    async def _worker(self, queue: asyncio.Queue, robots, delay: Optional[float]):
+        while True:
+            url, depth = await queue.get()
+            try:
+                if self._started >= self.max_pages:
+                    continue
+                if robots is not None and not robots.can_fetch(config.HTTP_USER_AGENT, url):
+                    self.pages.append({"url": url, "depth": depth, "status": "disallowed", "error": None})
+                    continue
+                self._started += 1
+                await self._wait_turn(url, delay)
+                try:
+                    hrefs = await run_io(self.process_page, url)
+                except Exception as e:
+                    self.pages.append({"url": url, "depth": depth, "status": "error", "error": str(e)})
+                    continue
+                self.pages.append({"url": url, "depth": depth, "status": "stored", "error": None})
+                if depth >= self.max_depth:
+                    continue
+                for href in hrefs or []:
+                    link = urllib.parse.urljoin(url, href)
+                    if not self._is_internal(link):
+                        continue
+                    link = normalize_url(link)
+                    if self.seen.add(link):
+                        queue.put_nowait((link, depth + 1))
+            finally:
+                queue.task_done()
+
+    async def crawl(self) -> Dict[str, object]:
+        """Runs the crawl to completion
+
+        Returns:
+            dict: ``{"start_url", "pages", "stored", "errors", "disallowed",
+                  "discovered", "elapsed_seconds"}`` where ``pages`` lists
+                  ``{"url", "depth", "status", "error"}`` in completion order
+        """
+        started = time.monotonic()
+        robots = await load_robots(self.start_url) if self.respect_robots else None
+        delay = self._crawl_delay(robots)
+
+        queue = asyncio.Queue()
+        self.seen.add(self.start_url)
+        queue.put_nowait((self.start_url, 0))
+        workers = [asyncio.create_task(self._worker(queue, robots, delay)) for _ in range(self.concurrency)]
+        try:
+            await queue.join()
+        finally:
+            for worker in workers:
+                worker.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
+
+        statuses = [page["status"] for page in self.pages]
+        return {
+            "start_url": self.start_url,
+            "pages": self.pages,
+            "stored": statuses.count("stored"),
+            "errors": statuses.count("error"),
+            "disallowed": statuses.count("disallowed"),
+            "discovered": self.seen.count,
+            "elapsed_seconds": round(time.monotonic() - started, 3),
+        }
@@ -0,0 +1,144 @@
+import hashlib
+import json
+import os
+import threading
+import zlib
+from collections import OrderedDict
+from typing import Dict, List
+
+import config
+from css_parser import iter_css_rules
+
+# Bump when the shape of parsed rules changes so old disk entries are ignored
+CACHE_FORMAT = 1
+
+
+def content_hash(css: str) -> str:
+    return hashlib.sha256(css.encode("utf-8", errors="replace")).hexdigest()
+
+
+def _parse(css: str) -> Dict:
+    at_rule_counts = {}
+    rules = list(iter_css_rules(css, at_rule_counts))
+    return {"rules": rules, "at_rule_counts": at_rule_counts}
+
+
+def _with_rates(stats: Dict) -> Dict:
+    hits = stats["memory_hits"] + stats["disk_hits"]
+    lookups = hits + stats["misses"]
+    return dict(stats, hits=hits, hit_rate=round(hits / lookups, 4) if lookups else 0)
+
+
+def combine_stats(stats: List[Dict]) -> Dict:
+    """Sums ParsedCssCache.stats of several processes (each has its own memory tier)"""
+    keys = ("memory_hits", "disk_hits", "misses", "evictions", "memory_entries", "memory_bytes")
+    return _with_rates({key: sum(entry[key] for entry in stats) for key in keys})
+
+
+class ParsedCssCache:
+    """Two-tier cache of parsed stylesheets keyed by the sha256 of their text
+
+    The first tier is an in-process LRU bounded by the uncompressed JSON size
+    of its entries. The second is a directory of zlib-compressed JSON blobs
+    (safe to load even from a shared directory; unreadable ones count as
+    misses and are removed), so identical CDN bundles (Bootstrap, Tailwind,
+    ...) are parsed once per machine, not once per page. Entries are shared:
+    callers must not mutate the returned rules. Each process (the server and
+    every analysis worker) has its own memory tier and counters.
+    """
+
+    def __init__(self, max_bytes: int = config.CSS_CACHE_MEMORY_BYTES, directory: str = config.CSS_CACHE_DIR):
+        self.max_bytes = max_bytes
+        self.directory = directory
+        self._entries = OrderedDict()  # hash -> (parsed, size)
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.counters = {"memory_hits": 0, "disk_hits": 0, "misses": 0, "evictions": 0}
+
+    def get(self, css: str) -> Dict:
+        """``{"rules": [...], "at_rule_counts": {...}}`` for ``css``"""
+        key = content_hash(css or "")
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.counters["memory_hits"] += 1
+                return entry[0]
+
+        parsed, size = self._load(key)
+        if parsed is not None:
+            counter = "disk_hits"
+        else:
+            parsed = _parse(css or "")
+            text = json.dumps(parsed, separators=(",", ":")).encode()
+            size = len(text)
+            self._write(key, bytes([CACHE_FORMAT]) + zlib.compress(text))
+            counter = "misses"
+
+        with self._lock:
+            self.counters[counter] += 1
+            # Entries are charged their uncompressed JSON size, a floor for the objects kept
+            self._remember(key, parsed, size)
+        return parsed
+
+    def rules(self, css: str) -> List[Dict]:
+        return self.get(css)["rules"]
+
+    def stats(self) -> Dict:
+        """Counters of this process only; see combine_stats for several processes"""
+        with self._lock:
+            return _with_rates({
+                **self.counters,
+                "memory_entries": len(self._entries),
+                "memory_bytes": self._bytes,
+            })
+
+    def _remember(self, key, parsed, size):
+        if key in self._entries or size > self.max_bytes:
+            return
+        self._entries[key] = (parsed, size)
+        self._bytes += size
+        while self._bytes > self.max_bytes:
+            _, (_, evicted_size) = self._entries.popitem(last=False)
+            self._bytes -= evicted_size
+            self.counters["evictions"] += 1
+
+    def _path(self, key):
+        return os.path.join(self.directory, key[:2], key + ".bin")
+
+    def _load(self, key):
+        # (parsed, uncompressed size) from the disk tier; unreadable entries are dropped
+        blob = self._read(key)
+        if blob is None:
+            return None, 0
+        try:
+            text = zlib.decompress(blob[1:])
+            return json.loads(text), len(text)
+        except (zlib.error, ValueError):
+            try:
+                os.remove(self._path(key))
+            except OSError:
+                pass
+            return None, 0
+
+    def _read(self, key):
+        try:
+            with open(self._path(key), "rb") as f:
+                blob = f.read()
+        except OSError:
+            return None
+        return blob if blob[:1] == bytes([CACHE_FORMAT]) else None
+
+    def _write(self, key, blob):
+        path = self._path(key)
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(tmp_path, "wb") as f:
+                f.write(blob)
+            os.replace(tmp_path, path)
+        except OSError:
+            pass  # The disk tier is best effort; the memory tier still works
+
+
+parsed_css_cache = ParsedCssCache()
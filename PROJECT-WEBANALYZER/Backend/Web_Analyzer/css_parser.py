@@ -0,0 +1,136 @@
+import re
+from typing import Dict, Iterator, List, Optional
+
+# Everything the parser has to react to. Text between these tokens is only
+# sliced, never scanned character by character, so parsing stays linear in
+# the size of the stylesheet. Strings stop at a newline (as they do in CSS)
+# so an unterminated quote cannot make the scanner run to the end of input.
+TOKEN = re.compile(
+    r"""/\*.*?(?:\*/|\Z)|"(?:\\.|[^"\\\n])*"?|'(?:\\.|[^'\\\n])*'?|[{}();]""",
+    re.S,
+)
+
+# At-rules whose block holds ordinary style rules
+GROUPING_AT_RULES = {"media", "supports", "container", "layer", "document", "-moz-document", "scope"}
+
+
+def _at_rule_name(prelude: str) -> str:
+    match = re.match(r"@([\w-]+)", prelude)
+    return match.group(1).lower() if match else ""
+
+
+def _add_declaration(text: str, properties: Dict[str, str]):
+    if ":" in text:
+        name, value = text.split(":", 1)  # Split only on the first colon
+        name, value = name.strip(), value.strip()
+        if name and value:
+            properties[name] = value
+
+
+def _group_context(stack):
+    groups = [entry[1] for entry in stack if entry[0] == "group"]
+    media = [group[len("@media"):].strip() for group in groups if _at_rule_name(group) == "media"]
+    return (" and ".join(media) if media else None), groups
+
+
+def iter_css_rules(css: str, at_rule_counts: Optional[Dict[str, int]] = None) -> Iterator[Dict]:
+    """Yields the style rules of a stylesheet in a single streaming pass
+
+    Each rule is ``{"selector", "properties", "media", "at_rules"}``:
+    ``media`` joins the conditions of every enclosing ``@media`` block with
+    ``and`` (``None`` outside media queries) and ``at_rules`` lists the
+    preludes of all enclosing grouping at-rules, outermost first.
+
+    Comments are dropped, ``{ } ;`` inside strings and parentheses (for
+    example ``url(data:...;base64,...)``) are treated as text, and blocks
+    that do not contain style rules (``@font-face``, ``@keyframes``,
+    ``@page``, nested rules inside a style rule) are skipped.
+
+    Args:
+        css (str): Stylesheet text
+        at_rule_counts (dict): When given, incremented per at-rule name
+                               (``{"media": 3, "import": 1}``) as they are seen
+    """
+    if not css:
+        return
+    stack: List[tuple] = []  # ("group", prelude) or ("rule", selector, properties)
+    context = (None, [])  # (media, at_rules) for the current group nesting
+    pieces: List[str] = []
+    last = 0
+    paren_depth = 0
+    skip_depth = 0
+
+    for match in TOKEN.finditer(css):
+        token = match.group()
+        before = css[last:match.start()]
+        last = match.end()
+
+        if skip_depth:
+            if token == "{":
+                skip_depth += 1
+            elif token == "}":
+                skip_depth -= 1
+            continue
+
+        pieces.append(before)
+        first = token[0]
+        if first == "/":
+            continue
+        if first in "\"'":
+            pieces.append(token)
+            continue
+        if token == "(":
+            paren_depth += 1
+            pieces.append(token)
+            continue
+        if token == ")":
+            paren_depth = max(0, paren_depth - 1)
+            pieces.append(token)
+            continue
+        if paren_depth:
+            pieces.append(token)
+            continue
+
+        text = "".join(pieces).strip()
+        pieces = []
+        in_rule = bool(stack) and stack[-1][0] == "rule"
+
+        if token == ";":
+            if in_rule:
+                _add_declaration(text, stack[-1][2])
+            elif text.startswith("@") and at_rule_counts is not None:
+                name = _at_rule_name(text)
+                at_rule_counts[name] = at_rule_counts.get(name, 0) + 1
+        elif token == "{":
+            if in_rule:
+                # Nested rule inside a style rule
+                skip_depth = 1
+            elif text.startswith("@"):
+                name = _at_rule_name(text)
+                if at_rule_counts is not None:
+                    at_rule_counts[name] = at_rule_counts.get(name, 0) + 1
+                if name in GROUPING_AT_RULES:
+                    stack.append(("group", text))
+                    context = _group_context(stack)
+                else:
+                    skip_depth = 1
+            else:
+                stack.append(("rule", text, {}))
+        else:  # "}"
+            if in_rule:
+                _, selector, properties = stack.pop()
+                _add_declaration(text, properties)
+                if selector:
+                    yield {
+                        "selector": selector,
+                        "properties": properties,
+                        "media": context[0],
+                        "at_rules": list(context[1]),
+                    }
+            elif stack:
+                stack.pop()
+                context = _group_context(stack)
+
+
+def parse_css(css: str) -> List[Dict]:
+    return list(iter_css_rules(css))
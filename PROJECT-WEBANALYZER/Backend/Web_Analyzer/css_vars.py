@@ -0,0 +1,94 @@
+from typing import Dict, Optional
+
+# Stands in for a custom property that cannot be resolved: part of a var()
+# cycle, or undefined without a fallback. CSS calls this the
+# "guaranteed-invalid value".
+INVALID = "<invalid>"
+
+
+def _find_var_calls(value: str):
+    """Yields (start, end, name, fallback) for each top-level var(...) in value"""
+    search_from = 0
+    while True:
+        start = value.find("var(", search_from)
+        if start == -1:
+            return
+        depth, comma, i = 1, None, start + 4
+        while i < len(value) and depth:
+            char = value[i]
+            if char == "(":
+                depth += 1
+            elif char == ")":
+                depth -= 1
+            elif char == "," and depth == 1 and comma is None:
+                comma = i
+            i += 1
+        if depth:
+            return  # Unbalanced; leave the rest as is
+        inner_end = i - 1
+        name = value[start + 4:comma if comma is not None else inner_end].strip()
+        fallback = value[comma + 1:inner_end].strip() if comma is not None else None
+        yield start, i, name, fallback
+        search_from = i
+
+
+class VarResolver:
+    """Resolves CSS custom properties once per stylesheet set
+
+    ``table`` maps every custom property to its fully substituted value (or
+    INVALID). Every property in a var() cycle is INVALID, even one whose
+    reference has a fallback, whichever property of the cycle is resolved
+    first. ``resolve_value`` substitutes var() calls anywhere in a value,
+    honouring fallbacks, and memoizes per distinct value string, so resolving
+    the same declaration for many elements is a dictionary lookup.
+    """
+
+    def __init__(self, all_vars: Dict[str, str]):
+        self.all_vars = all_vars
+        self.table: Dict[str, str] = {}
+        self._values: Dict[str, str] = {}
+        self._resolving = []  # Properties being resolved, outermost first
+        self._cyclic = set()
+        for name in all_vars:
+            self._resolve_name(name)
+
+    def _resolve_name(self, name: str) -> Optional[str]:
+        if name in self.table:
+            return self.table[name]
+        if name not in self.all_vars:
+            return None
+        if name in self._resolving:
+            # Cycle: the property references itself through var(); every property
+            # from it to the innermost one being resolved is part of the cycle
+            self._cyclic.update(self._resolving[self._resolving.index(name):])
+            return INVALID
+        self._resolving.append(name)
+        resolved = self._substitute(self.all_vars[name])
+        self._resolving.pop()
+        if name in self._cyclic:
+            resolved = INVALID
+        self.table[name] = resolved
+        return resolved
+
+    def _substitute(self, value: str) -> str:
+        if "var(" not in value:
+            return value
+        pieces, last = [], 0
+        for start, end, name, fallback in _find_var_calls(value):
+            replacement = self._resolve_name(name)
+            if replacement is None or replacement == INVALID:
+                if fallback is None:
+                    return INVALID
+                replacement = self._substitute(fallback)
+                if replacement == INVALID:
+                    return INVALID
+            pieces.append(value[last:start])
+            pieces.append(replacement)
+            last = end
+        pieces.append(value[last:])
+        return "".join(pieces)
+
+    def resolve_value(self, value: str) -> str:
+        if value not in self._values:
+            self._values[value] = self._substitute(value)
+        return self._values[value]
@@ -0,0 +1,128 @@
+import asyncio
+import functools
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import analysis_worker
+import config
+
+# Async endpoints hand their blocking work to one of two bounded pools so the
+# event loop keeps serving other requests:
+#   run_io  - database, outbound HTTP, bcrypt, file I/O (threads)
+#   run_cpu - parsing and analysis that holds the GIL (processes); the
+#             function and its arguments must be picklable
+
+
+class PoolMetrics:
+    """Counts work submitted to a pool; ``queued`` is work waiting for a free worker"""
+
+    def __init__(self, name, workers):
+        self.name = name
+        self.workers = workers
+        self.in_flight = 0
+        self.peak_queued = 0
+        self.completed = 0
+        self.failed = 0
+        self._lock = threading.Lock()
+
+    def submitted(self):
+        with self._lock:
+            self.in_flight += 1
+            self.peak_queued = max(self.peak_queued, self.in_flight - self.workers)
+
+    def finished(self, future):
+        with self._lock:
+            self.in_flight -= 1
+            if future.cancelled() or future.exception() is not None:
+                self.failed += 1
+            else:
+                self.completed += 1
+
+    def stats(self):
+        with self._lock:
+            return {
+                "workers": self.workers,
+                "running": min(self.in_flight, self.workers),
+                "queued": max(0, self.in_flight - self.workers),
+                "peak_queued": self.peak_queued,
+                "completed": self.completed,
+                "failed": self.failed
+            }
+
+
+_io_pool = None
+_cpu_pool = None
+_pool_lock = threading.Lock()
+io_metrics = PoolMetrics("io", config.IO_POOL_SIZE)
+cpu_metrics = PoolMetrics("cpu", config.CPU_POOL_SIZE)
+
+
+def get_io_pool():
+    global _io_pool
+    if _io_pool is None:
+        with _pool_lock:
+            if _io_pool is None:
+                _io_pool = ThreadPoolExecutor(max_workers=config.IO_POOL_SIZE, thread_name_prefix="io-pool")
+    return _io_pool
+
+
+def get_cpu_pool():
+    global _cpu_pool
+    if _cpu_pool is None:
+        with _pool_lock:
+            if _cpu_pool is None:
+                # Long-lived workers: models are loaded once per process by init_worker
+                _cpu_pool = ProcessPoolExecutor(
+                    max_workers=config.CPU_POOL_SIZE,
+                    mp_context=multiprocessing.get_context(config.CPU_POOL_START_METHOD),
+                    initializer=analysis_worker.init_worker
+                )
+    return _cpu_pool
+
+
+async def _run(pool, metrics, func, args, kwargs):
+    call = functools.partial(func, *args, **kwargs)
+    metrics.submitted()
+    future = asyncio.get_running_loop().run_in_executor(pool, call)
+    future.add_done_callback(metrics.finished)
+    return await future
+
+
+async def run_io(func, *args, **kwargs):
+    """Runs a blocking call on the I/O thread pool and awaits its result"""
+    return await _run(get_io_pool(), io_metrics, func, args, kwargs)
+
+
+async def run_cpu(func, *args, **kwargs):
+    """Runs a CPU-bound call on the process pool and awaits its result"""
+    return await _run(get_cpu_pool(), cpu_metrics, func, args, kwargs)
+
+
+async def run_on_workers(func):
+    """Runs ``func()`` once per submission slot of the process pool; returns ``{pid: result}``
+
+    The pool hands tasks to whichever worker is free, so a busy worker may
+    not answer and an idle one may answer twice (the later answer is kept).
+    """
+    results = await asyncio.gather(*(run_cpu(func) for _ in range(config.CPU_POOL_SIZE)))
+    return dict(results)
+
+
+async def warm_cpu_pool():
+    """Starts every analysis worker so the first requests do not pay for model loading"""
+    pids = await asyncio.gather(*(run_cpu(analysis_worker.ping) for _ in range(config.CPU_POOL_SIZE)))
+    return len(set(pids))
+
+
+def pool_stats():
+    return {"io": io_metrics.stats(), "cpu": cpu_metrics.stats()}
+
+
+def shutdown(wait=True):
+    global _io_pool, _cpu_pool
+    with _pool_lock:
+        pools, _io_pool, _cpu_pool = (_io_pool, _cpu_pool), None, None
+    for pool in pools:
+        if pool is not None:
+            pool.shutdown(wait=wait, cancel_futures=True)
@@ -0,0 +1,34 @@
+import datetime
+from urllib.parse import urlparse
+
+import config
+
+
+def ttl_for_url(url):
+    """Returns the freshness TTL in seconds for a URL
+
+    The most specific entry in config.SCRAPE_DOMAIN_TTLS wins, so a TTL set
+    for ``example.com`` also covers ``www.example.com`` unless that host has
+    its own entry.
+    """
+    host = (urlparse(url).hostname or "").lower()
+    labels = host.split(".")
+    for i in range(len(labels)):
+        domain = ".".join(labels[i:])
+        if domain in config.SCRAPE_DOMAIN_TTLS:
+            return config.SCRAPE_DOMAIN_TTLS[domain]
+    return config.SCRAPE_TTL_SECONDS
+
+
+def snapshot_age(scraped_content, now=None):
+    """Age of a ScrapedContent row in seconds"""
+    now = now or datetime.datetime.utcnow()
+    fetched_at = scraped_content.fetched_at or scraped_content.created_at
+    if fetched_at is None:
+        return None
+    return max(0.0, (now - fetched_at).total_seconds())
+
+
+def is_stale(scraped_content, now=None):
+    age = snapshot_age(scraped_content, now)
+    return age is None or age > ttl_for_url(scraped_content.url)
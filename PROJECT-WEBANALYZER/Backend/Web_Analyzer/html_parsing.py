@@ -0,0 +1,57 @@
+import logging
+
+from bs4 import BeautifulSoup, FeatureNotFound, Tag
+
+import config
+
+FALLBACK_PARSER = "html.parser"
+
+
+def _available(parser):
+    try:
+        BeautifulSoup("", parser)
+        return True
+    except FeatureNotFound:
+        return False
+
+
+def resolve_parser(name):
+    """Returns ``name`` if that BeautifulSoup backend is installed, else html.parser"""
+    if name != FALLBACK_PARSER and not _available(name):
+        logging.warning("HTML parser %r is not installed; falling back to %s", name, FALLBACK_PARSER)
+        return FALLBACK_PARSER
+    return name
+
+
+_parser = resolve_parser(config.HTML_PARSER)
+
+
+def current_parser():
+    return _parser
+
+
+def set_parser(name):
+    """Switches the backend used by make_soup (benchmarks, tests)"""
+    global _parser
+    _parser = resolve_parser(name)
+    return _parser
+
+
+def as_soup(document):
+    """Returns ``document`` if it is already parsed, otherwise parses it
+
+    Analyzers accept either raw HTML or a tree; an endpoint parses the page
+    once with make_soup and hands the same tree to every analyzer.
+    """
+    if isinstance(document, Tag):
+        return document
+    return make_soup(document)
+
+
+def make_soup(markup):
+    """Parses HTML with the configured backend (C-backed lxml by default)
+
+    Every analyzer builds its tree through here instead of naming a parser,
+    so the backend is chosen in one place.
+    """
+    return BeautifulSoup(markup, _parser)
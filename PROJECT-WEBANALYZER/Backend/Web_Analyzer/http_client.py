@@ -0,0 +1,184 @@
+import asyncio
+import atexit
+import contextlib
+import threading
+import weakref
+
+import aiohttp
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+import config
+
+# One place for every outbound request the analyzers make. Both faces keep
+# connections alive between calls, cap the pool per host, apply a default
+# timeout, retry transient failures with exponential backoff and send the
+# same User-Agent.
+
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+DEFAULT_HEADERS = {"User-Agent": config.HTTP_USER_AGENT}
+
+
+class _PooledSession(requests.Session):
+    def request(self, method, url, **kwargs):
+        kwargs.setdefault("timeout", config.HTTP_TIMEOUT)
+        return super().request(method, url, **kwargs)
+
+
+def _build_adapter():
+    retry = Retry(
+        total=config.HTTP_RETRIES,
+        backoff_factor=config.HTTP_RETRY_BACKOFF,
+        status_forcelist=RETRY_STATUSES,
+        allowed_methods=frozenset({"GET", "HEAD", "OPTIONS"}),
+        raise_on_status=False,
+    )
+    return HTTPAdapter(
+        pool_connections=config.HTTP_POOL_HOSTS,
+        pool_maxsize=config.HTTP_POOL_PER_HOST,
+        max_retries=retry,
+    )
+
+
+_adapter = _build_adapter()
+_session = None
+_session_lock = threading.Lock()
+
+
+def new_session() -> requests.Session:
+    """Returns a session with its own cookie jar that shares the connection pool
+
+    Use this when a caller needs isolated state (cookies, auth); plain
+    fetches should go through ``get``/``head``.
+    """
+    session = _PooledSession()
+    session.headers.update(DEFAULT_HEADERS)
+    session.mount("http://", _adapter)
+    session.mount("https://", _adapter)
+    return session
+
+
+def get_session() -> requests.Session:
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                _session = new_session()
+    return _session
+
+
+def conditional_headers(validators) -> dict:
+    """Builds If-None-Match / If-Modified-Since headers from stored validators
+
+    ``validators`` is any mapping with optional ``etag`` and ``last_modified``
+    keys, as saved from an earlier response.
+    """
+    headers = {}
+    if validators:
+        if validators.get("etag"):
+            headers["If-None-Match"] = validators["etag"]
+        if validators.get("last_modified"):
+            headers["If-Modified-Since"] = validators["last_modified"]
+    return headers
+
+
+def get(url, **kwargs) -> requests.Response:
+    return get_session().get(url, **kwargs)
+
+
+def head(url, **kwargs) -> requests.Response:
+    return get_session().head(url, **kwargs)
+
+
+# Async face: one aiohttp session per event loop
+
+_async_sessions = weakref.WeakKeyDictionary()
+
+
+def get_async_session() -> aiohttp.ClientSession:
+    loop = asyncio.get_running_loop()
+    session = _async_sessions.get(loop)
+    if session is None or session.closed:
+        connector = aiohttp.TCPConnector(
+            limit=config.HTTP_POOL_MAX,
+            limit_per_host=config.HTTP_POOL_PER_HOST,
+            ttl_dns_cache=300,
+        )
+        session = aiohttp.ClientSession(
+            connector=connector,
+            timeout=aiohttp.ClientTimeout(total=config.HTTP_TIMEOUT),
+            headers=DEFAULT_HEADERS,
+        )
+        _async_sessions[loop] = session
+    return session
+
+
+async def close_async_session():
+    session = _async_sessions.pop(asyncio.get_running_loop(), None)
+    if session is not None and not session.closed:
+        await session.close()
+
+
+@contextlib.asynccontextmanager
+async def request(method, url, retries=None, **kwargs):
+    """Async context manager yielding an ``aiohttp.ClientResponse``
+
+    Connection errors, timeouts and retryable statuses are retried with
+    exponential backoff before the response is handed to the caller.
+    """
+    retries = config.HTTP_RETRIES if retries is None else retries
+    session = get_async_session()
+    attempt = 0
+    while True:
+        try:
+            response = await session.request(method, url, **kwargs)
+        except (aiohttp.ClientConnectionError, asyncio.TimeoutError):
+            if attempt >= retries:
+                raise
+        else:
+            if response.status not in RETRY_STATUSES or attempt >= retries:
+                break
+            response.release()
+        await asyncio.sleep(config.HTTP_RETRY_BACKOFF * (2 ** attempt))
+        attempt += 1
+    try:
+        yield response
+    finally:
+        response.release()
+
+
+async def async_get_text(url, **kwargs):
+    async with request("GET", url, **kwargs) as response:
+        return response.status, await response.text(errors="replace")
+
+
+# Sync callers of async code share one long-lived background loop, so its
+# aiohttp pool stays warm between calls instead of dying with asyncio.run().
+
+_loop = None
+_loop_lock = threading.Lock()
+
+
+def _background_loop():
+    global _loop
+    if _loop is None:
+        with _loop_lock:
+            if _loop is None:
+                loop = asyncio.new_event_loop()
+                threading.Thread(target=loop.run_forever, name="http-client-loop", daemon=True).start()
+                _loop = loop
+    return _loop
+
+
+def _close_background_loop():
+    if _loop is not None and _loop.is_running():
+        asyncio.run_coroutine_threadsafe(close_async_session(), _loop).result(timeout=5)
+
+
+atexit.register(_close_background_loop)
+
+
+def run_sync(coro):
+    """Runs a coroutine on the shared background loop and waits for its result"""
+    return asyncio.run_coroutine_threadsafe(coro, _background_loop()).result()
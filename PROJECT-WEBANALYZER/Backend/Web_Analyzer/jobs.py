@@ -0,0 +1,188 @@
+import asyncio
+import datetime
+import logging
+import uuid
+from typing import Awaitable, Callable, Dict, List, Optional
+
+from sqlalchemy import and_, or_
+
+import config
+from database import Job, SessionLocal
+from executor import run_io
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+
+
+def job_as_dict(job: Job) -> Dict[str, object]:
+    return {
+        "job_id": job.id,
+        "url": job.url,
+        "feature": job.feature,
+        "sub_feature": job.sub_feature,
+        "analyzers": job.analyzers,
+        "status": job.status,
+        "error": job.error,
+        "created_at": job.created_at,
+        "started_at": job.started_at,
+        "finished_at": job.finished_at
+    }
+
+
+# Function to run a blocking callable with a database session of its own; jobs are
+# updated from the scheduler, outside any request's session
+def _with_session(func, *args):
+    db = SessionLocal()
+    try:
+        return func(db, *args)
+    finally:
+        db.close()
+
+
+def _insert_job(db, url, feature, sub_feature, analyzers):
+    job = Job(
+        id=str(uuid.uuid4()),
+        url=url,
+        feature=feature,
+        sub_feature=sub_feature,
+        analyzers=analyzers,
+        status=QUEUED,
+        created_at=datetime.datetime.utcnow()
+    )
+    db.add(job)
+    db.commit()
+    return job_as_dict(job)
+
+
+def _claimable(stale_before):
+    # Queued jobs, and running ones whose runner must have died: a live one times out first
+    return or_(Job.status == QUEUED, and_(Job.status == RUNNING, Job.started_at < stale_before))
+
+
+def _claim_job(db, job_id, stale_before):
+    # A conditional UPDATE, so when several server processes queue the same job
+    # exactly one of them gets to run it
+    started_at = datetime.datetime.utcnow()
+    claimed = db.query(Job).filter(Job.id == job_id, _claimable(stale_before)).update(
+        {"status": RUNNING, "started_at": started_at, "error": None}, synchronize_session=False
+    )
+    db.commit()
+    if not claimed:
+        return None
+    return job_as_dict(db.query(Job).filter(Job.id == job_id).one())
+
+
+def _finish_job(db, job_id, status, result=None, error=None, started_at=None):
+    # Given the claim's started_at, only that claim may finish the job; a job that
+    # was reclaimed from a runner presumed dead keeps the newer runner's outcome
+    condition = Job.status.in_([QUEUED, RUNNING])
+    if started_at is not None:
+        condition = and_(Job.status == RUNNING, Job.started_at == started_at)
+    db.query(Job).filter(Job.id == job_id, condition).update(
+        {"status": status, "result": result, "error": error, "finished_at": datetime.datetime.utcnow()},
+        synchronize_session=False
+    )
+    db.commit()
+
+
+def _unfinished_job_ids(db, stale_before):
+    jobs = db.query(Job.id).filter(_claimable(stale_before)).order_by(Job.created_at).all()
+    return [job.id for job in jobs]
+
+
+def _load_job(db, job_id):
+    job = db.query(Job).filter(Job.id == job_id).first()
+    if job is None:
+        return None
+    return dict(job_as_dict(job), result=job.result)
+
+
+class JobScheduler:
+    """In-process job queue: jobs are rows in the jobs table, their IDs wait on an asyncio.Queue
+
+    ``runner(job)`` is awaited for each job with the dict from ``job_as_dict``
+    and returns the JSON result stored on the row. ``start`` picks up queued
+    jobs, and running jobs started more than ``timeout`` seconds ago (their
+    server stopped). Every server process may queue the same job; a job is
+    claimed with a conditional update before it runs, so it runs once.
+
+    Args:
+        runner (callable): ``async runner(job) -> dict``
+        workers (int): Jobs run at the same time
+        timeout (float): Seconds before a running job is marked failed
+    """
+
+    def __init__(
+        self,
+        runner: Callable[[Dict[str, object]], Awaitable[Dict[str, object]]],
+        workers: int = config.JOB_WORKERS,
+        timeout: float = config.JOB_TIMEOUT,
+    ):
+        self.runner = runner
+        self.workers = max(1, workers)
+        self.timeout = timeout
+        self._queue: Optional[asyncio.Queue] = None
+        self._tasks: List[asyncio.Task] = []
+
+    async def start(self):
+        self._queue = asyncio.Queue()
+        for job_id in await run_io(_with_session, _unfinished_job_ids, self._stale_before()):
+            self._queue.put_nowait(job_id)
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def submit(self, url: str, analyzers: List[str], feature: Optional[str] = None, sub_feature: Optional[str] = None) -> Dict[str, object]:
+        """Stores a queued job and schedules it; returns its status record"""
+        if self._queue is None:
+            raise RuntimeError("Job scheduler is not running")
+        job = await run_io(_with_session, _insert_job, url, feature, sub_feature, analyzers)
+        self._queue.put_nowait(job["job_id"])
+        return job
+
+    async def get(self, job_id: str) -> Optional[Dict[str, object]]:
+        """Status record of a job plus its ``result``, None for an unknown ID"""
+        return await run_io(_with_session, _load_job, job_id)
+
+    def queued(self) -> int:
+        return self._queue.qsize() if self._queue is not None else 0
+
+    def _stale_before(self) -> datetime.datetime:
+        return datetime.datetime.utcnow() - datetime.timedelta(seconds=self.timeout)
+
+    async def _worker(self):
+        # Errors are logged and the loop carries on; a dead worker would strand queued jobs
+        while True:
+            job_id = await self._queue.get()
+            try:
+                await self._run(job_id)
+            except Exception as e:
+                logging.exception("Job %s could not be run", job_id)
+                try:
+                    await run_io(_with_session, _finish_job, job_id, FAILED, None, str(e) or type(e).__name__)
+                except Exception:
+                    logging.exception("Job %s could not be marked failed", job_id)
+            finally:
+                self._queue.task_done()
+
+    async def _run(self, job_id: str):
+        job = await run_io(_with_session, _claim_job, job_id, self._stale_before())
+        if job is None:
+            # Finished, or claimed by another worker or server process
+            return
+        started_at = job["started_at"]
+        try:
+            result = await asyncio.wait_for(self.runner(job), self.timeout)
+        except asyncio.TimeoutError:
+            await run_io(_with_session, _finish_job, job_id, FAILED, None, f"Timed out after {self.timeout:g} seconds", started_at)
+        except Exception as e:
+            logging.error("Job %s failed: %s", job_id, e)
+            await run_io(_with_session, _finish_job, job_id, FAILED, None, str(e) or type(e).__name__, started_at)
+        else:
+            await run_io(_with_session, _finish_job, job_id, DONE, result, None, started_at)
@@ -0,0 +1,134 @@
+import asyncio
+import urllib.parse
+from collections import defaultdict
+from typing import AsyncIterator, Dict, List, Optional
+
+import aiohttp
+
+import config
+import http_client
+from ttl_cache import TTLCache
+
+
+DEFINITIVE_ERRORS = (404, 410)
+
+
+def is_definitive(status: int) -> bool:
+    """Whether a link status is the server's settled answer rather than a passing failure"""
+    return status < 400 or status in DEFINITIVE_ERRORS
+
+
+class LinkStatusCache(TTLCache):
+    """Remembers link check results for a while, shared by every request
+
+    Navigation and footer links repeat on every page of a site, so a status
+    seen recently is reused instead of asking the host again. Definitive
+    answers (2xx, 3xx, 404, 410) expire after ``ttl`` seconds; any other
+    status (429, 5xx, ...) may clear up soon and only lasts ``transient_ttl``.
+    The oldest entries are dropped beyond ``max_entries``. Only answers from
+    the server are cached; network errors are retried on the next check.
+    """
+
+    def __init__(
+        self,
+        ttl: float = config.LINK_STATUS_TTL,
+        max_entries: int = config.LINK_STATUS_CACHE_SIZE,
+        transient_ttl: float = config.LINK_STATUS_TRANSIENT_TTL,
+    ):
+        super().__init__(ttl, max_entries)
+        self.transient_ttl = transient_ttl
+
+    def get(self, url: str) -> Optional[dict]:
+        result = super().get(url)
+        return dict(result) if result is not None else None
+
+    def put(self, url: str, result: dict):
+        super().put(url, dict(result), self.ttl if is_definitive(result["status"]) else self.transient_ttl)
+
+
+link_status_cache = LinkStatusCache()
+
+
+class LinkChecker:
+    """Checks links over the shared connection pool with bounded concurrency
+
+    Each link is asked for with HEAD first; when the server rejects or fails
+    the HEAD (any status >= 400, many servers answer 403/405 to HEAD) the
+    check is repeated with a GET whose body is never downloaded.
+
+    Args:
+        max_concurrency (int): Maximum checks in flight across all hosts
+        per_host (int): Maximum checks in flight to a single host
+        timeout (float): Per-request timeout in seconds
+        cache (LinkStatusCache): Results shared across requests; None disables it
+    """
+
+    def __init__(
+        self,
+        max_concurrency: int = config.LINK_CHECK_CONCURRENCY,
+        per_host: int = config.LINK_CHECK_PER_HOST,
+        timeout: float = config.LINK_CHECK_TIMEOUT,
+        cache: Optional[LinkStatusCache] = link_status_cache,
+    ):
+        self.max_concurrency = max_concurrency
+        self.per_host = per_host
+        self.timeout = timeout
+        self.cache = cache
+
+    async def check_all(self, urls: List[str]) -> List[Dict[str, object]]:
+        """Checks every distinct URL once
+
+        Args:
+            urls (list[str]): Absolute http(s) URLs, duplicates allowed
+
+        Returns:
+            list[dict]: ``{"url", "status", "message"}`` per distinct URL, in
+                        order of first appearance
+        """
+        slots = self._new_slots()
+        return await asyncio.gather(*(self._check(slots, url) for url in dict.fromkeys(urls)))
+
+    async def iter_check(self, urls: List[str]) -> AsyncIterator[Dict[str, object]]:
+        """Like check_all, but yields each result as soon as its check finishes
+
+        Nothing is accumulated, and checks still pending are cancelled when
+        the consumer stops early (e.g. a streaming client disconnects).
+        """
+        slots = self._new_slots()
+        tasks = [asyncio.ensure_future(self._check(slots, url)) for url in dict.fromkeys(urls)]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                yield await next_done
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    def _new_slots(self):
+        # Limits belong to one call; overlapping calls on one checker each get their own
+        return asyncio.Semaphore(self.max_concurrency), defaultdict(lambda: asyncio.Semaphore(self.per_host))
+
+    async def _status(self, slots: tuple, method: str, url: str):
+        global_slots, host_slots = slots
+        host = urllib.parse.urlparse(url).netloc
+        async with global_slots, host_slots[host]:
+            async with http_client.request(
+                method, url, allow_redirects=True, timeout=aiohttp.ClientTimeout(total=self.timeout)
+            ) as response:
+                # The body is never read; releasing the response drops it
+                return response.status, response.reason
+
+    async def _check(self, slots: tuple, url: str) -> Dict[str, object]:
+        if self.cache is not None:
+            cached = self.cache.get(url)
+            if cached is not None:
+                return cached
+        try:
+            status, reason = await self._status(slots, "HEAD", url)
+            if status >= 400:
+                status, reason = await self._status(slots, "GET", url)
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            return {"url": url, "status": "error", "message": str(e) or type(e).__name__}
+        result = {"url": url, "status": status, "message": reason}
+        if self.cache is not None:
+            self.cache.put(url, result)
+        return result
@@ -1,35 +1,60 @@
-from fastapi import FastAPI, HTTPException, Depends, File, UploadFile, Form, APIRouter
+from fastapi import FastAPI, HTTPException, Depends, File, UploadFile, Form, APIRouter, BackgroundTasks
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, StreamingResponse
+from fastapi.encoders import jsonable_encoder
 import urllib.parse
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from sqlalchemy.orm import Session
+from sqlalchemy.exc import IntegrityError
 import json
 from database import ScrapedContent, get_db
-from colorgrading import color_grading_report
-from scraper import (find_properties, extract_css_from_webpage)
-import requests
-from textblob import TextBlob
-from sklearn.feature_extraction.text import TfidfVectorizer
-from bs4 import BeautifulSoup
-from typing import Optional
+from freshness import snapshot_age, is_stale
+from scraper import (find_properties, extract_css_from_webpage, fetch_page_snapshot)
+import http_client
+from html_parsing import make_soup
+from page_features import extract_page_features, is_current
+from robots_status import check_robots_txt
+from typing import List, Optional
 from fastapi.staticfiles import StaticFiles
 from content_style_grading import visual_consistency_report
-from ads_recommendation import generate_text_report
-from ads_data import ad_topic_mapping
-from responsive import responsive
-from Seo_grading import seo_grading
 from web_security import web_security_report, review_http_headers, inspect_cookies_and_tokens, analyze_session_management, authorization_checks
-from methods import (run_link_checker, fetch_webpage, parse_html, extract_css_js_files, evaluate_file_sizes)
-from database import SessionLocal, engine, get_db, Base, User, Report
+from methods import (check_links as check_page_links, stream_links, evaluate_asset_sizes)
+from database import SessionLocal, engine, get_db, Base, User, Report, StylesheetRecord
+from stylesheet_store import StylesheetStore
+from crawler import SiteCrawler
+from batch import BatchAnalyzer
+import jobs
+from jobs import JobScheduler
+from executor import run_io, run_cpu, run_on_workers, pool_stats, warm_cpu_pool, shutdown as shutdown_pools
+import analysis_worker
+from page_performance import NetworkModel, webpage_performance
+import config
+from css_cache import combine_stats, parsed_css_cache
 from passlib.context import CryptContext
 import shutil
 import os
 import base64
 import datetime
+import threading
+import asyncio
+import time
 
 Base.metadata.create_all(bind=engine)
 
 app = FastAPI()
+
+@app.on_event("startup")
+async def start_analysis_workers():
+    # Load the NLP/ML models in every analysis worker before traffic arrives
+    if config.CPU_POOL_WARM_ON_STARTUP:
+        workers = await warm_cpu_pool()
+        logging.info("Analysis workers ready: %d", workers)
+
+@app.on_event("shutdown")
+async def close_http_sessions():
+    # The aiohttp pool used by handlers lives on the server loop
+    await http_client.close_async_session()
+    shutdown_pools(wait=False)
 app.mount("/static", StaticFiles(directory="static"), name="static")
 app.add_middleware(
     CORSMiddleware,
@@ -44,6 +69,19 @@ class ScrapeRequest(BaseModel):
     sub_feature: Optional[str] = None
     query: Optional[str] = None
 
+class CrawlRequest(BaseModel):
+    url: str
+    max_depth: Optional[int] = Field(None, ge=0)  # Capped at CRAWL_DEPTH_LIMIT
+    max_pages: Optional[int] = Field(None, ge=1)  # Capped at CRAWL_PAGE_LIMIT
+    concurrency: Optional[int] = Field(None, ge=1)  # Capped at CRAWL_CONCURRENCY
+    respect_robots: bool = True
+
+class PerformanceRequest(BaseModel):
+    url: str
+    rtt_ms: Optional[float] = Field(None, ge=0)  # Omitted values use the PERF_* defaults
+    bandwidth_kbps: Optional[float] = Field(None, gt=0)
+    connections_per_host: Optional[int] = Field(None, ge=1)
+
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
 
@@ -76,6 +114,10 @@ async def register_user(
     image: UploadFile = File(None),  # Optional file
     db: Session = Depends(get_db)
 ):
+    # Database queries, bcrypt and the image write all block, so they run on the I/O pool
+    return await run_io(create_user, db, email, password, username, user_details, sub_details, profession, image)
+
+def create_user(db: Session, email, password, username, user_details, sub_details, profession, image):
     user = db.query(User).filter(User.email == email).first()
     if user:
         raise HTTPException(status_code=400, detail="Email already registered")
@@ -146,6 +188,9 @@ class ReportRequest(BaseModel):
 
 @app.post("/save_report")
 async def save_report(report_request: ReportRequest, db: Session = Depends(get_db)):
+    return await run_io(create_report, db, report_request)
+
+def create_report(db: Session, report_request: ReportRequest):
     new_report = Report(
         user_id=report_request.user_id,
         feature=report_request.feature,
@@ -182,28 +227,67 @@ def get_report(report_id: int, db: Session = Depends(get_db)):
 
 
 class Scraper:
-    def __init__(self, url, db: Session):
+    def __init__(self, url, db: Session, shared_stylesheets=None):
         self.url = url
         self.db = db
+        self.shared_stylesheets = shared_stylesheets
         self.html_elements = ""
         self.elements_properties = {}
         self.css = ""
         self.body_content = ""
+        self.validators = {}
+        self.stylesheets = []
+        self.stylesheet_hashes = []
+        self.features = None
+        self.not_modified = False
+        self.store = StylesheetStore(db)
+
+    def load_stylesheet_validators(self, css_urls):
+        records = self.db.query(StylesheetRecord).filter(StylesheetRecord.url.in_(css_urls)).all()
+        stored_css = self.store.css_for([record.content_hash for record in records])
+        return {
+            record.url: {
+                "etag": record.etag,
+                "last_modified": record.last_modified,
+                "css": stored_css.get(record.content_hash)
+            }
+            for record in records
+        }
 
-    def fetch_and_parse(self):
-        response = requests.get(self.url)
-        response.raise_for_status()
-        soup = BeautifulSoup(response.text, 'html.parser')
+    def fetch_and_parse(self, existing_content=None):
+        # Download the page and its stylesheets once; every step below reads from this snapshot.
+        # A cached page is revalidated with its stored ETag / Last-Modified first.
+        validators = None
+        if existing_content is not None:
+            validators = {"etag": existing_content.etag, "last_modified": existing_content.last_modified}
+        snapshot = fetch_page_snapshot(
+            self.url,
+            validators=validators,
+            load_stylesheet_validators=self.load_stylesheet_validators,
+            shared_stylesheets=self.shared_stylesheets
+        )
+        if snapshot.not_modified:
+            # Unchanged since the last scrape: skip parsing and property extraction entirely
+            self.not_modified = True
+            return
+        self.validators = snapshot.validators
+        self.stylesheets = snapshot.stylesheets
+        soup = snapshot.soup
         self.body_content = soup.body.get_text(separator=' ', strip=True) if soup.body else ""
         self.html_elements = str(soup)
-        self.css = extract_css_from_webpage(self.url)
+        # Index what the analyzers read while the tree is in hand
+        self.features = extract_page_features(soup)
+        self.css = extract_css_from_webpage(self.url, snapshot=snapshot)
         
         # Convert to a Python dictionary if find_properties returns a JSON string
         print(1)
+        # Stylesheets already in the content-addressed store are not parsed again
         properties = find_properties(self.url, [
             'background-color', 'color', 'font-family', 'font-size', 'font-weight',
             'margin', 'padding', 'text-align', 'justify-content', 'align-items'
-        ])
+        ], snapshot=snapshot, parse_stylesheet=self.store.rules_for)
+        # Failed downloads are not stored; their slot keeps document order
+        self.stylesheet_hashes = [None if sheet.get("error") else self.store.add(sheet["css"]) for sheet in self.stylesheets]
         print(2)
         
         if isinstance(properties, str):  # If properties is a JSON string, convert it
@@ -213,7 +297,13 @@ class Scraper:
             print(4)
             self.elements_properties = properties
 
-    def save_to_db(self):
+    def save_to_db(self, existing_content=None):
+        if self.not_modified and existing_content is not None:
+            # 304 from the origin: the stored snapshot is still current
+            existing_content.fetched_at = datetime.datetime.utcnow()
+            self.db.commit()
+            return
+
         # Print the type and value of elements_properties and css before serialization
         print("Before serialization:")
         print(f"Type of elements_properties: {type(self.elements_properties)}")
@@ -223,7 +313,9 @@ class Scraper:
 
         # Serialize if needed
         elements_properties_serialized = json.dumps(self.elements_properties) if isinstance(self.elements_properties, dict) else self.elements_properties
-        css_serialized = json.dumps(self.css) if isinstance(self.css, (list, tuple)) else self.css
+        # External stylesheets live in the content-addressed store and are referenced by hash
+        stored_css = ([],) + tuple(self.css[1:]) if isinstance(self.css, (list, tuple)) else self.css
+        css_serialized = json.dumps(stored_css) if isinstance(stored_css, (list, tuple)) else stored_css
 
         # Print the type and value of elements_properties and css after serialization
         print("After serialization:")
@@ -232,24 +324,52 @@ class Scraper:
         print(f"Type of css_serialized: {type(css_serialized)}")
         print(f"Value of css_serialized: {css_serialized}")
 
-        # Create the ScrapedContent object
-        scraped_content = ScrapedContent(
-            url=self.url,
-            html_elements=self.html_elements,
-            elements_properties=elements_properties_serialized,  # JSON serialization here
-            css=css_serialized,  # Serialize tuple or list
-            body_content=self.body_content,
-            created_at=datetime.datetime.utcnow()
-        )
+        now = datetime.datetime.utcnow()
+        if existing_content is not None:
+            # Refresh the snapshot in place; url is unique
+            scraped_content = existing_content
+            scraped_content.html_elements = self.html_elements
+            scraped_content.elements_properties = elements_properties_serialized
+            scraped_content.css = css_serialized
+            scraped_content.body_content = self.body_content
+            scraped_content.fetched_at = now
+            scraped_content.etag = self.validators.get("etag")
+            scraped_content.last_modified = self.validators.get("last_modified")
+            scraped_content.stylesheet_hashes = self.stylesheet_hashes
+            scraped_content.features = self.features
+        else:
+            # Create the ScrapedContent object
+            scraped_content = ScrapedContent(
+                url=self.url,
+                html_elements=self.html_elements,
+                elements_properties=elements_properties_serialized,  # JSON serialization here
+                css=css_serialized,  # Serialize tuple or list
+                body_content=self.body_content,
+                created_at=now,
+                fetched_at=now,
+                etag=self.validators.get("etag"),
+                last_modified=self.validators.get("last_modified"),
+                stylesheet_hashes=self.stylesheet_hashes,
+                features=self.features
+            )
 
-        # Add to the session
-        self.db.add(scraped_content)
+            # Add to the session
+            self.db.add(scraped_content)
+        self.store.flush()
+        self.store.save_records(self.stylesheets, self.stylesheet_hashes, now)
 
         try:
             # Commit the transaction
             self.db.commit()
             # Refresh to get the updated instance (ID and other auto-generated fields)
             self.db.refresh(scraped_content)
+        except IntegrityError as e:
+            self.db.rollback()
+            # Another request stored this page first: update its row instead
+            stored_content = self.load_from_db() if existing_content is None else None
+            if stored_content is None:
+                raise ValueError(f"Error during commit: {e}")
+            self.save_to_db(stored_content)
         except Exception as e:
             # Rollback in case of error
             self.db.rollback()
@@ -258,21 +378,77 @@ class Scraper:
     def load_from_db(self):
         return self.db.query(ScrapedContent).filter(ScrapedContent.url == self.url).first()
 
+# Function to read the page feature record of a stored snapshot; rows scraped before the
+# record existed (or with an older layout) are indexed once and updated in place
+def load_page_features(db: Session, scraped_content):
+    features = scraped_content.features
+    if not is_current(features):
+        features = extract_page_features(make_soup(scraped_content.html_elements))
+        scraped_content.features = features
+        db.commit()
+    return features
+
+# URLs with a background re-scrape in flight, so a burst of stale hits triggers only one
+_refreshing_urls = set()
+_refreshing_lock = threading.Lock()
+
+def refresh_scraped_content(url: str):
+    db = SessionLocal()
+    try:
+        scraper = Scraper(url, db)
+        existing_content = scraper.load_from_db()
+        scraper.fetch_and_parse(existing_content)
+        scraper.save_to_db(existing_content)
+    except Exception as e:
+        logging.error("Background refresh of %s failed: %s", url, e)
+    finally:
+        db.close()
+        with _refreshing_lock:
+            _refreshing_urls.discard(url)
+
+# Function used by the crawler for each page: scrape (or revalidate) and store it with a
+# session of its own, since pages are processed in parallel worker threads
+def crawl_page(url: str):
+    db = SessionLocal()
+    try:
+        scraper = Scraper(url, db)
+        existing_content = scraper.load_from_db()
+        scraper.fetch_and_parse(existing_content)
+        scraper.save_to_db(existing_content)
+        features = scraper.features or load_page_features(db, existing_content)
+        return features["links"]
+    finally:
+        db.close()
+
+def schedule_refresh(url: str, background_tasks: BackgroundTasks):
+    with _refreshing_lock:
+        if url in _refreshing_urls:
+            return False
+        _refreshing_urls.add(url)
+    background_tasks.add_task(refresh_scraped_content, url)
+    return True
+
 @app.post("/scrape")
-async def scrape(scrape_request: ScrapeRequest, db: Session = Depends(get_db)):
+async def scrape(scrape_request: ScrapeRequest, background_tasks: BackgroundTasks, db: Session = Depends(get_db)):
     try:
         scraper = Scraper(scrape_request.url, db)
-        existing_content = scraper.load_from_db()
+        existing_content = await run_io(scraper.load_from_db)
         if existing_content:
+            # Serve the cached snapshot right away; stale ones are re-scraped in the background
+            stale = is_stale(existing_content)
+            refreshing = schedule_refresh(scraper.url, background_tasks) if stale else False
             return {
                 "message": "Content already exists in the database.",
-                "data": existing_content
+                "data": await run_io(stored_content_response, db, existing_content),
+                "age_seconds": snapshot_age(existing_content),
+                "stale": stale,
+                "refreshing": refreshing
             }
         else:
             print(10)
-            scraper.fetch_and_parse()
+            await run_io(scraper.fetch_and_parse)
             print(11)
-            scraper.save_to_db()
+            await run_io(scraper.save_to_db)
             print(12)
             return {
                 "message": "Content scraped and saved successfully.",
@@ -282,34 +458,276 @@ async def scrape(scrape_request: ScrapeRequest, db: Session = Depends(get_db)):
                     "elements_properties": scraper.elements_properties,
                     "css": scraper.css,
                     "body_content": scraper.body_content
-                }
+                },
+                "age_seconds": 0,
+                "stale": False,
+                "refreshing": False
             }
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
 
+def load_page_css(db: Session, scraped_content):
+    """Rebuilds (external stylesheets, style tags, inline css) for a stored page"""
+    css = json.loads(scraped_content.css) if scraped_content.css else [[], [], []]
+    if isinstance(css, str):
+        css = [[css], [], []]
+    if scraped_content.stylesheet_hashes:
+        stored_css = StylesheetStore(db).css_for(scraped_content.stylesheet_hashes)
+        css[0] = [stored_css.get(sheet_hash) or "" for sheet_hash in scraped_content.stylesheet_hashes]
+    return css
+
+# Function to build the /scrape payload of a stored page. External stylesheets live in the
+# content-addressed store, so they are put back into css the way a fresh scrape returns it.
+def stored_content_response(db: Session, scraped_content):
+    data = {column.name: getattr(scraped_content, column.name) for column in ScrapedContent.__table__.columns}
+    data["css"] = json.dumps(load_page_css(db, scraped_content))
+    return data
+
 def get_html_content(db: Session, url: str):
     scraped_content = db.query(ScrapedContent).filter(ScrapedContent.url == url).first()
     if not scraped_content:
         raise HTTPException(status_code=404, detail="Content not found")
     return scraped_content.html_elements
 
+# Function to list the stylesheet texts the responsive analyzer reads: external, then style tags
+def load_css_content(db: Session, scraped_content):
+    css_from_external_stylesheets, css_from_style_tags, _ = load_page_css(db, scraped_content)
+    return [css for css in css_from_external_stylesheets + css_from_style_tags if css]
+
+class StoredPage:
+    """Plain copy of the ScrapedContent columns the analyzers read
+
+    Built once on the I/O pool, so analyzers running concurrently never touch
+    (or lazily reload) attributes of a row bound to a shared session.
+    """
+
+    COLUMNS = ("url", "html_elements", "elements_properties", "css", "body_content",
+               "stylesheet_hashes", "features", "created_at", "fetched_at")
+
+    def __init__(self, scraped_content):
+        for column in self.COLUMNS:
+            setattr(self, column, getattr(scraped_content, column))
+
+# Function to build the feature record of a row scraped before it existed (or with an
+# older layout) and store it, using a session of its own
+def backfill_page_features(content: StoredPage):
+    if is_current(content.features):
+        return content.features
+    features = extract_page_features(make_soup(content.html_elements))
+    db = SessionLocal()
+    try:
+        db.query(ScrapedContent).filter(ScrapedContent.url == content.url).update(
+            {"features": features}, synchronize_session=False
+        )
+        db.commit()
+    finally:
+        db.close()
+    return features
+
+class PageContext:
+    """One stored page shared by every analyzer run on it
+
+    The row is loaded once and copied into a StoredPage; its feature record
+    and stylesheets are read on first use and reused by the other analyzers.
+    Database reads go through one lock since the session is not thread-safe,
+    and nothing commits on it. ``content`` is None for the analyzers that can
+    work from the live page alone.
+    """
+
+    def __init__(self, url, db: Session, content=None, scraped=False):
+        self.url = url
+        self.db = db
+        self.content = content
+        self.scraped = scraped
+        self._values = {}
+        self._db_lock = asyncio.Lock()
+
+    async def _load(self, key, func, *args):
+        async with self._db_lock:
+            if key not in self._values:
+                self._values[key] = await run_io(func, *args)
+        return self._values[key]
+
+    async def features(self):
+        return await self._load("features", backfill_page_features, self.content)
+
+    async def css_content(self):
+        return await self._load("css_content", load_css_content, self.db, self.content)
+
+    def elements_properties(self):
+        if "elements_properties" not in self._values:
+            self._values["elements_properties"] = json.loads(self.content.elements_properties)
+        return self._values["elements_properties"]
+
+# Function to load the stored snapshot of a page, or None when it was never scraped
+async def load_stored_page(url, db: Session):
+    existing_content = await run_io(Scraper(url, db).load_from_db)
+    if not existing_content:
+        return None
+    return PageContext(url, db, await run_io(StoredPage, existing_content))
+
+# Function to get a page's snapshot, scraping it when it is not stored yet. With revalidate,
+# a stale snapshot is re-fetched (conditionally) before it is used.
+async def load_page_context(url, db: Session, shared_stylesheets=None, revalidate=True):
+    scraper = Scraper(url, db, shared_stylesheets)
+    existing_content = await run_io(scraper.load_from_db)
+    if existing_content:
+        content = await run_io(StoredPage, existing_content)
+        if not (revalidate and is_stale(content)):
+            return PageContext(url, db, content)
+    await run_io(scraper.fetch_and_parse, existing_content)
+    await run_io(scraper.save_to_db, existing_content)
+    stored_content = await run_io(scraper.load_from_db)
+    return PageContext(url, db, await run_io(StoredPage, stored_content), scraped=True)
+
+# Analyzers: each takes a PageContext and returns the response of its endpoint
+
+async def analyze_color_grading(ctx: PageContext):
+    grading_results = await run_cpu(analysis_worker.color_report, analysis_worker.encode_json(ctx.elements_properties()))
+    return {
+        "message": "Color grading calculated successfully.",
+        "results": grading_results
+    }
+
+async def analyze_content_style(ctx: PageContext):
+    # Send data to frontend for consistency checks
+    return {
+        "message": "Content style data retrieved successfully.",
+        "html_content": ctx.content.html_elements,
+        "elements_properties": ctx.elements_properties()
+    }
+
+async def analyze_responsive(ctx: PageContext):
+    features = await ctx.features()
+    css_content = await ctx.css_content()
+    responsive_results = await run_cpu(
+        analysis_worker.responsive_report, analysis_worker.encode_json(features), analysis_worker.encode_json(css_content)
+    )
+    return {
+        "message": "Responsive design analysis completed successfully.",
+        "results": responsive_results
+    }
+
+async def analyze_seo_grading(ctx: PageContext):
+    features = await ctx.features()
+    # Title from the page feature record stored at scrape time
+    title = features["title"].strip() if features["title"] else None
+    if not title:
+        return {
+            "message": "Title not found in the HTML content."
+        }
+    # The robots.txt fetch is network-bound, so it stays out of the analysis workers
+    robots_txt_status = await run_io(check_robots_txt, ctx.url)
+    seo_results = await run_cpu(analysis_worker.seo_report, analysis_worker.encode_json(features), ctx.url, title, robots_txt_status)
+    return {
+        "message": "SEO grading completed successfully.",
+        "results": seo_results
+    }
+
+async def analyze_web_security(ctx: PageContext):
+    features = await ctx.features()
+    session = http_client.new_session()  # Own cookie jar, shared connection pool
+    username = None  # Provide username if needed
+    password = None  # Provide password if needed
+    protected_url = None  # Provide protected URL if needed
+    # SSL probe and header checks are network-bound
+    web_security_elements = await run_io(web_security_report, features, ctx.url, session, username, password, protected_url)
+    return {
+        "message": "Web security analysis completed successfully.",
+        "results": web_security_elements
+    }
+
+async def analyze_ads_recommendation(ctx: PageContext):
+    # spaCy, TF-IDF and TextBlob run in a warm analysis worker
+    ad_topics = await run_cpu(analysis_worker.ads_report, analysis_worker.encode_text(ctx.content.body_content))
+    return {
+        "message": "Ads recommendation completed successfully.",
+        "results": ad_topics
+    }
+
+async def analyze_file_sizes(ctx: PageContext):
+    url = ctx.url
+    if not url.startswith(('http://', 'https://')):
+        url = 'https://' + url
+    if ctx.content is not None:
+        html_content = ctx.content.html_elements
+    else:
+        status, html_content = await http_client.async_get_text(url)
+        if status != 200 or not html_content:
+            raise HTTPException(status_code=500, detail="Failed to fetch the webpage")
+    css_files, js_files, internal_css, internal_js = await run_cpu(
+        analysis_worker.css_js_files, analysis_worker.encode_text(html_content), url
+    )
+    # All files are sized concurrently; *_size_kb are bytes on the wire, *_decoded_kb after decompression
+    sizes = await evaluate_asset_sizes(css_files, js_files, internal_css, internal_js)
+    return {
+        "total_css_size_kb": sizes["css"]["transfer_size"] / 1024,
+        "total_js_size_kb": sizes["js"]["transfer_size"] / 1024,
+        "total_css_decoded_kb": sizes["css"]["decoded_size"] / 1024,
+        "total_js_decoded_kb": sizes["js"]["decoded_size"] / 1024,
+        "files": sizes["css"]["files"] + sizes["js"]["files"]
+    }
+
+async def analyze_links(ctx: PageContext):
+    # A stored page's links come from its feature record instead of a fresh download
+    hrefs = (await ctx.features())["links"] if ctx.content is not None else None
+    links_report = await check_page_links(ctx.url, hrefs=hrefs)
+    return {"message": "Link checking completed", "details": links_report}
+
+async def analyze_webpage_performance(ctx: PageContext, network=None):
+    # Reuse the scraped HTML when there is one; subresources are always measured live
+    html_content = ctx.content.html_elements if ctx.content is not None else None
+    performance_results = await webpage_performance(ctx.url, html_content, network)
+    return {
+        "message": "Webpage performance analysis completed successfully.",
+        "results": performance_results
+    }
+
+# Analyzers by name, as jobs, /batch and /analyze refer to them
+ANALYZERS = {
+    "color_grading": analyze_color_grading,
+    "content_style": analyze_content_style,
+    "responsive": analyze_responsive,
+    "seo_grading": analyze_seo_grading,
+    "web_security_analysis": analyze_web_security,
+    "ads_recommendation": analyze_ads_recommendation,
+    "webpage_performance": analyze_webpage_performance,
+    "evaluate_files": analyze_file_sizes,
+    "check_links": analyze_links,
+}
+
+# Function to run analyzers concurrently on one page; returns (results, errors, timings)
+# with the seconds each analyzer took
+async def run_analyzers(ctx: PageContext, names):
+    async def timed(name):
+        started = time.monotonic()
+        try:
+            result, error = jsonable_encoder(await ANALYZERS[name](ctx)), None
+        except HTTPException as e:
+            result, error = None, e.detail
+        except Exception as e:
+            result, error = None, str(e) or type(e).__name__
+        return name, result, error, round(time.monotonic() - started, 3)
+
+    results, errors, timings = {}, {}, {}
+    for name, result, error, elapsed in await asyncio.gather(*(timed(name) for name in dict.fromkeys(names))):
+        if error is None:
+            results[name] = result
+        else:
+            errors[name] = error
+        timings[name] = elapsed
+    return results, errors, timings
+
 @app.post("/color_grading")
 async def color_grading_endpoint(scrape_request: ScrapeRequest, db: Session = Depends(get_db)):
     try:
-        scraper = Scraper(scrape_request.url, db)
-        existing_content = scraper.load_from_db()
-        if not existing_content:
+        ctx = await load_stored_page(scrape_request.url, db)
+        if ctx is None:
             return {
                 "message": "Content not found in the database."
             }
-        elements_properties = json.loads(existing_content.elements_properties)
-        grading_results = color_grading_report(elements_properties)
-        print(grading_results)
-        return {
-            "message": "Color grading calculated successfully.",
-            "results": grading_results
-        }
+        return await analyze_color_grading(ctx)
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
     
@@ -332,26 +750,17 @@ async def content_style_endpoint(scrape_request: ScrapeRequest, db: Session = De
             raise HTTPException(status_code=400, detail="URL is required.")
         
         # Retrieve elements properties from the database
-        scraper = Scraper(scrape_request.url, db)
-        existing_content = scraper.load_from_db()
+        ctx = await load_stored_page(scrape_request.url, db)
 
         # Check if content was found in the database
-        if not existing_content:
+        if ctx is None:
             raise HTTPException(status_code=404, detail="Content not found in the database.")
-        
-        elements_properties = json.loads(existing_content.elements_properties)
-        html_content = existing_content.html_elements  # Assuming html_elements is already a JSON string
 
         # Log the retrieved HTML content and properties
-        logging.info("HTML Content: %s", html_content)
-        logging.info("Elements Properties: %s", elements_properties)
-        
-        # Send data to frontend for consistency checks
-        return {
-            "message": "Content style data retrieved successfully.",
-            "html_content": html_content,
-            "elements_properties": elements_properties
-        }
+        logging.info("HTML Content: %s", ctx.content.html_elements)
+        logging.info("Elements Properties: %s", ctx.elements_properties())
+
+        return await analyze_content_style(ctx)
     
     except Exception as e:
         logging.error("Error Details: %s", str(e))  # Log error message
@@ -360,46 +769,91 @@ async def content_style_endpoint(scrape_request: ScrapeRequest, db: Session = De
 
 
 
+@app.get("/cache_stats")
+async def cache_stats():
+    # The CSS cache is per process: the server parses during scrapes, the analysis
+    # workers during responsive and colour grading
+    workers = await run_on_workers(analysis_worker.css_cache_stats)
+    server = parsed_css_cache.stats()
+    return {
+        "parsed_css": {
+            "total": combine_stats([server] + list(workers.values())),
+            "server": server,
+            "workers": {str(pid): stats for pid, stats in workers.items()}
+        }
+    }
+
+@app.get("/pool_stats")
+def executor_pool_stats():
+    # Queue depth per pool: work waiting for a free thread or process
+    return pool_stats()
+
 @app.post("/check_links")
 async def check_links(scrape_request: ScrapeRequest):
-    links_report = run_link_checker(scrape_request.url)
-    return {"message": "Link checking completed", "details": links_report}
+    # Runs on the server's event loop, so concurrent checks overlap with other requests
+    return await analyze_links(PageContext(scrape_request.url, None))
+
+@app.post("/check_links/stream")
+async def check_links_stream(scrape_request: ScrapeRequest, format: str = "ndjson"):
+    # One record per link as soon as it is checked, then {"summary": {...}};
+    # format=sse frames the same records as Server-Sent Events
+    if format not in ("ndjson", "sse"):
+        raise HTTPException(status_code=400, detail="format must be 'ndjson' or 'sse'")
+
+    async def records():
+        async for record in stream_links(scrape_request.url):
+            line = json.dumps(record)
+            if format == "sse":
+                event = "summary" if "summary" in record else "link"
+                yield f"event: {event}\ndata: {line}\n\n"
+            else:
+                yield line + "\n"
+
+    media_type = "text/event-stream" if format == "sse" else "application/x-ndjson"
+    return StreamingResponse(records(), media_type=media_type, headers={"Cache-Control": "no-cache"})
 
 @app.post("/evaluate_files")
 async def evaluate_files(scrape_request: ScrapeRequest):
-    html_content = fetch_webpage(scrape_request.url)
-    if html_content:
-        soup = parse_html(html_content)
-        css_files, js_files, internal_css, internal_js = extract_css_js_files(soup, scrape_request.url)
-        total_css_size, total_js_size = evaluate_file_sizes(css_files, js_files, internal_css, internal_js)
-        return {
-            "total_css_size_kb": total_css_size / 1024,
-            "total_js_size_kb": total_js_size / 1024
-        }
-    else:
-        raise HTTPException(status_code=500, detail="Failed to fetch the webpage")
+    # Always measured against the live page
+    return await analyze_file_sizes(PageContext(scrape_request.url, None))
     
+@app.post("/webpage_performance")
+async def webpage_performance_endpoint(performance_request: PerformanceRequest, db: Session = Depends(get_db)):
+    try:
+        ctx = await load_stored_page(performance_request.url, db) or PageContext(performance_request.url, db)
+        network = NetworkModel(
+            rtt_ms=performance_request.rtt_ms if performance_request.rtt_ms is not None else config.PERF_RTT_MS,
+            bandwidth_kbps=performance_request.bandwidth_kbps if performance_request.bandwidth_kbps is not None else config.PERF_BANDWIDTH_KBPS,
+            connections_per_host=performance_request.connections_per_host if performance_request.connections_per_host is not None else config.PERF_CONNECTIONS_PER_HOST
+        )
+        return await analyze_webpage_performance(ctx, network)
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@app.post("/crawl")
+async def crawl(crawl_request: CrawlRequest):
+    # Follows internal links from the start page and stores each page like /scrape does
+    crawler = SiteCrawler(
+        crawl_request.url,
+        crawl_page,
+        max_depth=crawl_request.max_depth if crawl_request.max_depth is not None else config.CRAWL_MAX_DEPTH,
+        max_pages=crawl_request.max_pages if crawl_request.max_pages is not None else config.CRAWL_MAX_PAGES,
+        concurrency=min(crawl_request.concurrency or config.CRAWL_CONCURRENCY, config.CRAWL_CONCURRENCY),
+        respect_robots=crawl_request.respect_robots
+    )
+    results = await crawler.crawl()
+    return {"message": "Crawl completed", "results": results}
+
 @app.post("/responsive")
 async def responsive_endpoint(scrape_request: ScrapeRequest, db: Session = Depends(get_db)):
     try:
         # Retrieve HTML and CSS from the database
-        scraper = Scraper(scrape_request.url, db)
-        existing_content = scraper.load_from_db()
-        if not existing_content:
+        ctx = await load_stored_page(scrape_request.url, db)
+        if ctx is None:
             return {
                 "message": "Content not found in the database."
             }
-
-        html_content = existing_content.html_elements
-        css_content = [existing_content.css]  # Assuming css is a single string, if not modify accordingly
-
-        # Calculate responsive design score
-        responsive_results = responsive(html_content, css_content)
-
-        return {
-            "message": "Responsive design analysis completed successfully.",
-            "results": responsive_results
-        }
+        return await analyze_responsive(ctx)
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
     
@@ -409,34 +863,13 @@ async def seo_grading_endpoint(
     db: Session = Depends(get_db)
 ):
     try:
-        # Retrieve html_content and css from the database
-        scraper = Scraper(scrape_request.url, db)
-        existing_content = scraper.load_from_db()
-        if not existing_content:
+        # Retrieve the page feature record from the database
+        ctx = await load_stored_page(scrape_request.url, db)
+        if ctx is None:
             return {
                 "message": "Content not found in the database."
             }
-        
-        html_content = existing_content.html_elements
-        base_url = scraper.url
-
-        # Extract title from HTML elements
-        from bs4 import BeautifulSoup
-        soup = BeautifulSoup(html_content, "html.parser")
-        title = soup.title.string.strip() if soup.title and soup.title.string else None
-
-        if not title:
-            return {
-                "message": "Title not found in the HTML content."
-            }
-
-        # Perform SEO grading
-        seo_results = seo_grading(html_content, base_url, title)
-
-        return {
-            "message": "SEO grading completed successfully.",
-            "results": seo_results
-        }
+        return await analyze_seo_grading(ctx)
     except Exception as e:
         print(str(e))
         raise HTTPException(status_code=400, detail=str(e))
@@ -447,28 +880,11 @@ async def web_security_analysis(scrape_request: ScrapeRequest, db: Session = Dep
     try:
         print("Received Data:", scrape_request)  # Log received data
         
-        # Retrieve elements properties and html content from the database
-        scraper = Scraper(scrape_request.url, db)
-        existing_content = scraper.load_from_db()
-        if not existing_content:
+        # Retrieve the page feature record from the database
+        ctx = await load_stored_page(scrape_request.url, db)
+        if ctx is None:
             return {"message": "Content not found in the database."}
-
-        elements_properties = json.loads(existing_content.elements_properties)
-        html_content = existing_content.html_elements
-
-        # Perform web security analysis
-        session = requests.Session()  # Create a session if needed
-        base_url = scrape_request.url
-        username = None  # Provide username if needed
-        password = None  # Provide password if needed
-        protected_url = None  # Provide protected URL if needed
-
-        web_security_elements = web_security_report(html_content, base_url, session, username, password, protected_url)
-
-        return {
-            "message": "Web security analysis completed successfully.",
-            "results": web_security_elements
-        }
+        return await analyze_web_security(ctx)
     except Exception as e:
         print("Error Details:", str(e))  # Log error details
         raise HTTPException(status_code=400, detail=str(e))
@@ -477,20 +893,189 @@ async def web_security_analysis(scrape_request: ScrapeRequest, db: Session = Dep
 @app.post("/ads_recommendation")
 async def ads_recommendation_endpoint(scrape_request: ScrapeRequest, db: Session = Depends(get_db)):
     try:
-        scraper = Scraper(scrape_request.url, db)
-        existing_content = scraper.load_from_db()
-        if not existing_content:
+        ctx = await load_stored_page(scrape_request.url, db)
+        if ctx is None:
             return {
                 "message": "Content not found in the database."
             }
-        
-        body_content = existing_content.body_content
+        return await analyze_ads_recommendation(ctx)
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
-        ad_topics = generate_text_report(body_content, ad_topic_mapping)
 
-        return {
-            "message": "Ads recommendation completed successfully.",
-            "results": ad_topics
-        }
+# Frontend sub_feature names to the analyzer behind them
+SUB_FEATURE_ANALYZERS = {
+    "Color Grading": "color_grading",
+    "Content Style": "content_style",
+    "Element Layout": "responsive",
+    "WebPage Performance": "webpage_performance",
+    "SEO Grading": "seo_grading",
+    "Security and Policy": "web_security_analysis",
+    "Ads Recommendation": "ads_recommendation",
+}
+
+# Analyzers a batch runs when the request does not name any
+BATCH_DEFAULT_ANALYZERS = ["color_grading", "responsive", "seo_grading", "web_security_analysis"]
+
+# Analyzers /analyze runs when the request does not name any
+ANALYZE_DEFAULT_ANALYZERS = [
+    "color_grading", "responsive", "seo_grading", "web_security_analysis",
+    "ads_recommendation", "evaluate_files", "check_links"
+]
+
+class JobRequest(BaseModel):
+    url: str
+    feature: Optional[str] = None
+    sub_feature: Optional[str] = None
+    analyzers: Optional[List[str]] = None
+
+# Function to analyze one page outside a request (jobs, /batch): scrape it if it is not
+# stored yet or revalidate a stale snapshot, then run the analyzers concurrently on it
+async def analyze_page(url, analyzers, shared_stylesheets=None):
+    db = SessionLocal()
+    try:
+        ctx = await load_page_context(url, db, shared_stylesheets)
+        results, errors, timings = await run_analyzers(ctx, analyzers)
+        return {"url": url, "results": results, "errors": errors, "timings": timings}
+    finally:
+        await run_io(db.close)
+
+class AnalyzeRequest(BaseModel):
+    url: str
+    analyzers: Optional[List[str]] = None
+
+class BatchRequest(BaseModel):
+    urls: List[str]
+    analyzers: Optional[List[str]] = None
+    max_concurrency: Optional[int] = None
+    per_host: Optional[int] = None
+    respect_robots: bool = True
+
+# Function run by the job scheduler for each job
+async def run_analysis_job(job):
+    report = await analyze_page(job["url"], job["analyzers"])
+    if report["errors"] and not report["results"]:
+        raise ValueError("; ".join(f"{name}: {error}" for name, error in report["errors"].items()))
+    return report
+
+job_scheduler = JobScheduler(run_analysis_job)
+
+@app.on_event("startup")
+async def start_job_scheduler():
+    # Also re-queues jobs that were queued or running when the server last stopped
+    await job_scheduler.start()
+
+@app.on_event("shutdown")
+async def stop_job_scheduler():
+    await job_scheduler.stop()
+
+@app.post("/jobs", status_code=202)
+async def submit_job(job_request: JobRequest):
+    analyzers = job_request.analyzers
+    if not analyzers:
+        analyzer = SUB_FEATURE_ANALYZERS.get(job_request.sub_feature)
+        if analyzer is None:
+            raise HTTPException(status_code=400, detail="Give analyzers or a known sub_feature.")
+        analyzers = [analyzer]
+    unknown = [name for name in analyzers if name not in ANALYZERS]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown analyzers: {', '.join(unknown)}")
+
+    job = await job_scheduler.submit(job_request.url, analyzers, job_request.feature, job_request.sub_feature)
+    return {
+        "message": "Job queued.",
+        "job_id": job["job_id"],
+        "status": job["status"],
+        "status_url": f"/jobs/{job['job_id']}",
+        "result_url": f"/jobs/{job['job_id']}/result"
+    }
+
+@app.get("/jobs/{job_id}")
+async def get_job_status(job_id: str):
+    job = await job_scheduler.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    job.pop("result")
+    return job
+
+@app.get("/jobs/{job_id}/result")
+async def get_job_result(job_id: str):
+    job = await job_scheduler.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    if job["status"] == jobs.FAILED:
+        raise HTTPException(status_code=500, detail=job["error"])
+    if job["status"] != jobs.DONE:
+        # Not finished yet: poll again later
+        job.pop("result")
+        return JSONResponse(status_code=202, content=jsonable_encoder(job))
+    return {"message": "Job completed.", "job_id": job_id, "results": job["result"]}
+
+@app.post("/batch")
+async def batch_analysis(batch_request: BatchRequest, format: str = "ndjson"):
+    # One record per URL as soon as it is analyzed, then {"summary": {...}};
+    # format=sse frames the same records as Server-Sent Events
+    if format not in ("ndjson", "sse"):
+        raise HTTPException(status_code=400, detail="format must be 'ndjson' or 'sse'")
+    analyzers = batch_request.analyzers or BATCH_DEFAULT_ANALYZERS
+    unknown = [name for name in analyzers if name not in ANALYZERS]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown analyzers: {', '.join(unknown)}")
+    urls = [url if url.startswith(('http://', 'https://')) else 'https://' + url for url in batch_request.urls]
+    if not urls:
+        raise HTTPException(status_code=400, detail="At least one URL is required.")
+    if len(urls) > config.BATCH_MAX_URLS:
+        raise HTTPException(status_code=400, detail=f"At most {config.BATCH_MAX_URLS} URLs per batch.")
+
+    batch = BatchAnalyzer(
+        lambda url, site: analyze_page(url, analyzers, site.stylesheets),
+        max_concurrency=min(batch_request.max_concurrency or config.BATCH_CONCURRENCY, config.BATCH_CONCURRENCY),
+        per_host=min(batch_request.per_host or config.BATCH_PER_HOST, config.BATCH_PER_HOST),
+        respect_robots=batch_request.respect_robots
+    )
+
+    async def records():
+        async for record in batch.iter_run(urls):
+            line = json.dumps(jsonable_encoder(record))
+            if format == "sse":
+                event = "summary" if "summary" in record else "page"
+                yield f"event: {event}\ndata: {line}\n\n"
+            else:
+                yield line + "\n"
+
+    media_type = "text/event-stream" if format == "sse" else "application/x-ndjson"
+    return StreamingResponse(records(), media_type=media_type, headers={"Cache-Control": "no-cache"})
+
+@app.post("/analyze")
+async def analyze(analyze_request: AnalyzeRequest, background_tasks: BackgroundTasks, db: Session = Depends(get_db)):
+    # Loads (or scrapes) the page once and runs every requested analyzer on it concurrently
+    analyzers = analyze_request.analyzers or ANALYZE_DEFAULT_ANALYZERS
+    unknown = [name for name in analyzers if name not in ANALYZERS]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown analyzers: {', '.join(unknown)}")
+    started = time.monotonic()
+    try:
+        # A stale snapshot is served like /scrape does and re-scraped in the background
+        ctx = await load_page_context(analyze_request.url, db, revalidate=False)
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
+    stale = is_stale(ctx.content)
+    refreshing = schedule_refresh(analyze_request.url, background_tasks) if stale else False
+    snapshot_seconds = round(time.monotonic() - started, 3)
+
+    results, errors, timings = await run_analyzers(ctx, analyzers)
+    return {
+        "message": "Analysis completed.",
+        "url": analyze_request.url,
+        "scraped": ctx.scraped,
+        "age_seconds": snapshot_age(ctx.content),
+        "stale": stale,
+        "refreshing": refreshing,
+        "results": results,
+        "errors": errors,
+        "timings": {
+            "snapshot": snapshot_seconds,
+            "analyzers": timings,
+            "total": round(time.monotonic() - started, 3)
+        }
+    }
@@ -1,59 +1,70 @@
-import requests
-from bs4 import BeautifulSoup
+from html_parsing import as_soup, make_soup
 from urllib.parse import urljoin
-import time
-import nest_asyncio
-import aiohttp
-import asyncio
 from urllib.parse import urlparse
-
-nest_asyncio.apply()
-
-async def fetch(session, url):
-    try:
-        async with session.get(url) as response:
-            status = response.status
-            return {
-                "url": url,
-                "status": status,
-                "message": response.reason
-            }
-    except Exception as e:
-        return {
-            "url": url,
-            "status": "error",
-            "message": str(e)
-        }
-
-async def check_links(base_url):
-    results = []
-    async with aiohttp.ClientSession() as session:
-        response = await session.get(base_url)
-        soup = BeautifulSoup(await response.text(), 'html.parser')
-        links = [a['href'] for a in soup.find_all('a', href=True)]
-        tasks = []
-        for link in links:
-            if link.startswith('#'):
-                continue
-            if not urlparse(link).scheme:
-                link = urljoin(base_url, link)
-            if link.startswith('http'):
-                tasks.append(fetch(session, link))
-            else:
-                results.append({
-                    "url": link,
-                    "status": "skipped",
-                    "message": "Non-HTTP URL"
-                })
-        responses = await asyncio.gather(*tasks)
-        results.extend(responses)
+import time
+import http_client
+from link_checker import LinkChecker
+from asset_sizer import AssetSizer, size_assets
+
+# Function to collect a page's links: http(s) ones to check and skipped results for the rest.
+# The page is fetched unless its hrefs (e.g. from the page feature record) are given.
+async def collect_page_links(base_url, hrefs=None):
+    skipped = []
+    if hrefs is None:
+        status, html = await http_client.async_get_text(base_url)
+        soup = make_soup(html)
+        hrefs = [a['href'] for a in soup.find_all('a', href=True)]
+    http_links = []
+    for link in hrefs:
+        if link.startswith('#'):
+            continue
+        if not urlparse(link).scheme:
+            link = urljoin(base_url, link)
+        if link.startswith('http'):
+            http_links.append(link)
+        else:
+            skipped.append({
+                "url": link,
+                "status": "skipped",
+                "message": "Non-HTTP URL"
+            })
+    return http_links, skipped
+
+async def check_links(base_url, checker=None, hrefs=None):
+    # Each distinct link is checked once: HEAD first, bounded per host, cached across requests
+    http_links, results = await collect_page_links(base_url, hrefs)
+    checker = checker or LinkChecker()
+    results.extend(await checker.check_all(http_links))
     return results
 
+# Function to yield link results as they complete, followed by one summary record
+async def stream_links(base_url, checker=None):
+    started = time.monotonic()
+    http_links, skipped = await collect_page_links(base_url)
+    summary = {"total": 0, "ok": 0, "broken": 0, "errors": 0, "skipped": 0}
+    for result in skipped:
+        summary["total"] += 1
+        summary["skipped"] += 1
+        yield result
+    checker = checker or LinkChecker()
+    async for result in checker.iter_check(http_links):
+        summary["total"] += 1
+        if result["status"] == "error":
+            summary["errors"] += 1
+        elif result["status"] >= 400:
+            summary["broken"] += 1
+        else:
+            summary["ok"] += 1
+        yield result
+    summary["elapsed_seconds"] = round(time.monotonic() - started, 3)
+    yield {"summary": summary}
+
+# Synchronous callers only; async code awaits check_links on its own loop
 def run_link_checker(base_url):
-    return asyncio.run(check_links(base_url))
+    return http_client.run_sync(check_links(base_url))
 
-def check_alignment_counts(html_content):
-    soup = BeautifulSoup(html_content, 'html.parser')
+def check_alignment_counts(document):
+    soup = as_soup(document)
     elements = soup.find_all(True)
     alignment_counts = {'total': len(elements), 'left': 0, 'center': 0, 'right': 0}
 
@@ -90,8 +101,8 @@ def check_alignment_counts(html_content):
 
     return alignment_counts
 
-def check_flexbox_consistency(html_content):
-    soup = BeautifulSoup(html_content, 'html.parser')
+def check_flexbox_consistency(document):
+    soup = as_soup(document)
     elements = soup.find_all(True)
     flexbox_counts = {'total': len(elements), 'matching': 0}
     flexbox_values = set()
@@ -123,8 +134,8 @@ def check_flexbox_consistency(html_content):
 
     return flexbox_counts
 
-def check_spacing_consistency(html_content):
-    soup = BeautifulSoup(html_content, 'html.parser')
+def check_spacing_consistency(document):
+    soup = as_soup(document)
     elements = soup.find_all(True)
     spacing_counts = {'total': len(elements), 'matching': 0}
     spacing_values = set()
@@ -152,23 +163,15 @@ def check_spacing_consistency(html_content):
 
     return spacing_counts
 
-def fetch_webpage(url, retries=3, delay=5):
-    headers = {
-        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-    }
-    for attempt in range(retries):
-        response = requests.get(url, headers=headers)
-        if response.status_code == 200:
-            return response.text
-        elif response.status_code == 503:
-            print(f"503 Service Unavailable. Retrying in {delay} seconds...")
-            time.sleep(delay)
-        else:
-            return None
+def fetch_webpage(url):
+    # Transient failures (503 and friends) are retried with backoff by the shared client
+    response = http_client.get(url)
+    if response.status_code == 200:
+        return response.text
     return None
 
 def parse_html(html_content):
-    soup = BeautifulSoup(html_content, 'html.parser')
+    soup = as_soup(html_content)
     return soup
 
 def extract_css_js_files(soup, base_url):
@@ -182,35 +185,47 @@ def extract_css_js_files(soup, base_url):
     return css_files, js_files, internal_css, internal_js
 
 def get_file_size(url):
-    headers = {
-        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+    # Bytes on the wire; the body is streamed and counted, never buffered
+    return size_assets([url])[0]["transfer_size"]
+
+# Function to size every external file concurrently and total transfer and decoded bytes per kind
+async def evaluate_asset_sizes(css_files, js_files, internal_css, internal_js, sizer=None):
+    sizer = sizer or AssetSizer()
+    results = await sizer.size_all(list(css_files) + list(js_files))
+    css_results, js_results = results[:len(css_files)], results[len(css_files):]
+    inline_css_size = sum(len(css) for css in internal_css)
+    inline_js_size = sum(len(js) for js in internal_js)
+    return {
+        "css": {
+            "transfer_size": sum(r["transfer_size"] for r in css_results) + inline_css_size,
+            "decoded_size": sum(r["decoded_size"] or 0 for r in css_results) + inline_css_size,
+            "files": css_results
+        },
+        "js": {
+            "transfer_size": sum(r["transfer_size"] for r in js_results) + inline_js_size,
+            "decoded_size": sum(r["decoded_size"] or 0 for r in js_results) + inline_js_size,
+            "files": js_results
+        }
     }
-    response = requests.head(url, headers=headers)
-    if response.status_code == 200:
-        content_length = response.headers.get('Content-Length')
-        if content_length:
-            return int(content_length)
-        else:
-            # Fallback to GET request if Content-Length is not provided
-            response = requests.get(url, headers=headers)
-            return len(response.content)
-    return 0
 
 def evaluate_file_sizes(css_files, js_files, internal_css, internal_js):
-    total_css_size = sum(get_file_size(url) for url in css_files) + sum(len(css) for css in internal_css)
-    total_js_size = sum(get_file_size(url) for url in js_files) + sum(len(js) for js in internal_js)
-    return total_css_size, total_js_size
+    sizes = http_client.run_sync(evaluate_asset_sizes(css_files, js_files, internal_css, internal_js))
+    return sizes["css"]["transfer_size"], sizes["js"]["transfer_size"]
 
 
-import requests
-from bs4 import BeautifulSoup
+from html_parsing import as_soup, make_soup
 from urllib.parse import urljoin
+import re
+from css_cache import parsed_css_cache
+
+REM_UNIT = re.compile(r'\d(?:\.\d+)?rem\b')
+EM_UNIT = re.compile(r'\d(?:\.\d+)?em\b')
 
 # Function to fetch the webpage
 def fetch_webpage(url):
     if not url.startswith(('http://', 'https://')):
         url = 'https://' + url
-    response = requests.get(url)
+    response = http_client.get(url)
     if response.status_code == 200:
         return response.text
     else:
@@ -218,7 +233,7 @@ def fetch_webpage(url):
 
 # Function to parse the HTML content
 def parse_html(html_content):
-    soup = BeautifulSoup(html_content, 'html.parser')
+    soup = as_soup(html_content)
     return soup
 
 # Function to extract image information
@@ -282,20 +297,39 @@ def extract_css(soup, base_url):
         href = link.get('href')
         if href:
             full_url = urljoin(base_url, href)
-            css_content.append(requests.get(full_url).text)
+            css_content.append(http_client.get(full_url).text)
     return css_content
 
+# Function to summarise CSS with the streaming parser; responsive() computes it once
+# and hands it to every evaluation below
+def css_statistics(css_content):
+    stats = {"media": 0, "flex": 0, "grid": 0, "rem": 0, "em": 0}
+    for css in css_content:
+        parsed = parsed_css_cache.get(css)
+        at_rule_counts = parsed["at_rule_counts"]
+        for rule in parsed["rules"]:
+            for name, value in rule['properties'].items():
+                if name == 'display':
+                    if value in ('flex', 'inline-flex'):
+                        stats["flex"] += 1
+                    elif value in ('grid', 'inline-grid'):
+                        stats["grid"] += 1
+                stats["rem"] += len(REM_UNIT.findall(value))
+                stats["em"] += len(EM_UNIT.findall(value))
+        stats["media"] += at_rule_counts.get("media", 0)
+    return stats
+
 # Function to evaluate media queries
-def evaluate_media_queries(css_content):
-    media_query_count = sum(css.count('@media') for css in css_content)
+def evaluate_media_queries(css_content, stats=None):
+    media_query_count = (stats or css_statistics(css_content))["media"]
     if media_query_count > 0:
         return f"Media queries are used ({media_query_count} found).", 10
     return "Media queries are not used.", 0
 
 # Function to evaluate flexible grid layouts
-def evaluate_flexible_layouts(css_content):
-    flex_count = sum(css.count('display: flex') for css in css_content)
-    grid_count = sum(css.count('display: grid') for css in css_content)
+def evaluate_flexible_layouts(css_content, stats=None):
+    stats = stats or css_statistics(css_content)
+    flex_count, grid_count = stats["flex"], stats["grid"]
     if flex_count > 0 or grid_count > 0:
         return f"Flexible layouts are used (Flex: {flex_count}, Grid: {grid_count}).", 10
     return "Flexible layouts are not used.", 0
@@ -311,16 +345,16 @@ def evaluate_touch_friendly(soup):
     return "Touch-friendly design is not used.", 0
 
 # Function to evaluate responsive typography
-def evaluate_responsive_typography(css_content):
-    rem_count = sum(css.count('rem') for css in css_content)
-    em_count = sum(css.count('em') for css in css_content)
+def evaluate_responsive_typography(css_content, stats=None):
+    stats = stats or css_statistics(css_content)
+    rem_count, em_count = stats["rem"], stats["em"]
     if rem_count > 0 or em_count > 0:
         return f"Responsive typography is used (rem: {rem_count}, em: {em_count}).", 10
     return "Responsive typography is not used.", 0
 
 # Main function
-def responsive(html_content, css_content):
-    soup = BeautifulSoup(html_content, 'html.parser')
+def responsive(document, css_content):
+    soup = as_soup(document)
 
     # Evaluate Viewport Meta Tag
     meta_tags = extract_meta_tags(soup)
@@ -333,17 +367,20 @@ def responsive(html_content, css_content):
     # Evaluate Lazy Loading
     lazy_loading_evaluation, lazy_loading_score = evaluate_lazy_loading(image_info)
 
+    # Every stylesheet is summarised once for the three CSS evaluations
+    css_stats = css_statistics(css_content)
+
     # Evaluate Media Queries
-    media_queries_evaluation, media_queries_score = evaluate_media_queries(css_content)
+    media_queries_evaluation, media_queries_score = evaluate_media_queries(css_content, css_stats)
 
     # Evaluate Flexible Layouts
-    flexible_layouts_evaluation, flexible_layouts_score = evaluate_flexible_layouts(css_content)
+    flexible_layouts_evaluation, flexible_layouts_score = evaluate_flexible_layouts(css_content, css_stats)
 
     # Evaluate Touch-Friendly Design
     touch_friendly_evaluation, touch_friendly_score = evaluate_touch_friendly(soup)
 
     # Evaluate Responsive Typography
-    responsive_typography_evaluation, responsive_typography_score = evaluate_responsive_typography(css_content)
+    responsive_typography_evaluation, responsive_typography_score = evaluate_responsive_typography(css_content, css_stats)
 
     # Evaluate Image Formats
     image_format_evaluation = evaluate_image_formats(image_info)
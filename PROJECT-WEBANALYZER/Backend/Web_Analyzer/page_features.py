@@ -0,0 +1,102 @@
+from html_parsing import as_soup
+import re
+
+# Bump when the record layout changes; stored records with another version are rebuilt
+FEATURES_VERSION = 1
+
+EMAIL_PATTERN = re.compile(r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b')
+PHONE_PATTERN = re.compile(r'\+?\d[\d -]{8,}\d')
+
+
+# Function to keep the first occurrence of each item, in document order
+def _unique(items):
+    return list(dict.fromkeys(items))
+
+
+# Function to check the inline-padding heuristic used for touch targets
+def _has_padding(tag):
+    style = tag.get('style')
+    return bool(style) and 'padding' in style
+
+
+def extract_page_features(document):
+    """Extracts the facts the analyzers read from a page in a single pass.
+
+    The record is plain JSON so it can be stored next to the scraped HTML
+    (ScrapedContent.features) and read back without parsing the page again.
+    URLs are kept exactly as written in the markup; analyzers resolve them
+    against the page URL themselves.
+
+    Args:
+        document (str or BeautifulSoup): Raw HTML or an already parsed tree.
+
+    Returns:
+        dict: Title, headings, meta tags, images, links, forms, inputs,
+            scripts, contact details and the touch-target count.
+    """
+    soup = as_soup(document)
+
+    meta = {}
+    viewport = []
+    for tag in soup.find_all('meta', attrs={'name': True}):
+        name = tag['name']
+        if name == 'viewport':
+            viewport.append(tag.get('content'))
+        # soup.find semantics: the first tag with a given name wins
+        meta.setdefault(name, tag.get('content'))
+
+    headings = []
+    for level in range(1, 7):  # h1 to h6
+        for heading in soup.find_all(f'h{level}'):
+            headings.append(heading.text.strip())
+
+    forms = []
+    for form in soup.find_all('form'):
+        forms.append({
+            "action": form.get('action'),
+            "inputs": [{"name": field.get('name'), "type": field.get('type')} for field in form.find_all('input')]
+        })
+
+    texts = list(soup.stripped_strings)
+    emails = _unique(text for text in texts if EMAIL_PATTERN.search(text))
+    phones = _unique(phone for text in texts for phone in PHONE_PATTERN.findall(text))
+
+    anchors = soup.find_all('a')
+    buttons = soup.find_all('button')
+
+    return {
+        "version": FEATURES_VERSION,
+        "title": str(soup.title.string) if soup.title and soup.title.string is not None else None,
+        "headings": headings,
+        "meta": meta,
+        "viewport": viewport,
+        "images": [
+            {
+                "src": img.get('src'),
+                "alt": img.get('alt'),
+                "srcset": img.get('srcset'),
+                "sizes": img.get('sizes'),
+                "loading": img.get('loading')
+            }
+            for img in soup.find_all('img')
+        ],
+        "links": [a['href'] for a in anchors if a.has_attr('href')],
+        "forms": forms,
+        "inputs": [{"name": field.get('name'), "type": field.get('type')} for field in soup.find_all('input')],
+        "scripts": [script['src'] for script in soup.find_all('script') if script.get('src')],
+        "captcha_present": bool(soup.find('div', {'class': 'g-recaptcha'})),
+        "emails": emails,
+        "phones": phones,
+        "touch_friendly_count": sum(1 for tag in buttons + anchors if _has_padding(tag))
+    }
+
+
+def as_features(document):
+    """Returns ``document`` if it is already a feature record, otherwise extracts one."""
+    if isinstance(document, dict):
+        return document
+    return extract_page_features(document)
+
+
+def is_current(features):
+    return isinstance(features, dict) and features.get("version") == FEATURES_VERSION
@@ -0,0 +1,293 @@
+import re
+import urllib.parse
+from typing import Dict, List, Optional
+
+import config
+import http_client
+from executor import run_io
+from asset_sizer import AssetSizer
+from html_parsing import as_soup
+from methods import extract_css_js_files
+
+MAX_AGE = re.compile(r'max-age\s*=\s*(\d+)', re.I)
+TEXT_KINDS = ("document", "css", "js")
+
+
+class NetworkModel:
+    """Simulated connection the page is loaded over
+
+    Args:
+        rtt_ms (float): Round-trip time in milliseconds
+        bandwidth_kbps (float): Downstream bandwidth in kilobits per second
+        connections_per_host (int): Parallel connections a browser opens per host
+    """
+
+    def __init__(
+        self,
+        rtt_ms: float = config.PERF_RTT_MS,
+        bandwidth_kbps: float = config.PERF_BANDWIDTH_KBPS,
+        connections_per_host: int = config.PERF_CONNECTIONS_PER_HOST,
+    ):
+        self.rtt_ms = rtt_ms
+        self.bandwidth_kbps = bandwidth_kbps
+        self.connections_per_host = max(1, connections_per_host)
+
+    def setup_ms(self, scheme: str) -> float:
+        # DNS lookup + TCP handshake, plus one more round trip for TLS 1.3
+        return self.rtt_ms * (3 if scheme == "https" else 2)
+
+    def transfer_ms(self, size_bytes: int) -> float:
+        return size_bytes * 8 / self.bandwidth_kbps
+
+    def as_dict(self) -> Dict[str, float]:
+        return {
+            "rtt_ms": self.rtt_ms,
+            "bandwidth_kbps": self.bandwidth_kbps,
+            "connections_per_host": self.connections_per_host
+        }
+
+
+def collect_subresources(document, base_url: str) -> List[Dict[str, object]]:
+    """Lists the files a browser fetches for the page, in document order
+
+    Stylesheets (except print-only ones) and parser-blocking scripts in the
+    head are marked render-blocking; lazy images are marked so they can be
+    left out of the initial load.
+    """
+    soup = as_soup(document)
+    css_files, js_files, _, _ = extract_css_js_files(soup, base_url)
+
+    blocking = set()
+    for link in soup.find_all('link', rel='stylesheet'):
+        if link.get('href') and (link.get('media') or 'all').strip().lower() != 'print':
+            blocking.add(urllib.parse.urljoin(base_url, link['href']))
+    for script in (soup.head or soup).find_all('script', src=True):
+        if not script.has_attr('async') and not script.has_attr('defer') and script.get('type') != 'module':
+            blocking.add(urllib.parse.urljoin(base_url, script['src']))
+
+    resources = [{"url": url, "kind": "css"} for url in css_files]
+    resources += [{"url": url, "kind": "js"} for url in js_files]
+    for img in soup.find_all('img', src=True):
+        resources.append({
+            "url": urllib.parse.urljoin(base_url, img['src']),
+            "kind": "image",
+            "lazy": img.get('loading') == 'lazy'
+        })
+
+    unique = {}
+    for resource in resources:
+        url = resource["url"]
+        if url == base_url or not url.startswith(('http://', 'https://')) or url in unique:
+            continue
+        resource["render_blocking"] = url in blocking
+        resource.setdefault("lazy", False)
+        unique[url] = resource
+    return list(unique.values())
+
+
+def is_cacheable(asset: Dict[str, object]) -> bool:
+    cache_control = (asset.get("cache_control") or "").lower()
+    if "no-store" in cache_control or "no-cache" in cache_control:
+        return False
+    max_age = MAX_AGE.search(cache_control)
+    if max_age:
+        return int(max_age.group(1)) > 0
+    return bool(asset.get("expires") or asset.get("etag") or asset.get("last_modified"))
+
+
+def simulate_load(document: Dict[str, object], resources: List[Dict[str, object]], network: NetworkModel) -> Dict[str, object]:
+    """Estimates when each file finishes loading
+
+    The document is fetched first; every subresource is discovered once it
+    has arrived. Render-blocking files are requested first, each host serves
+    at most ``connections_per_host`` files at once, a new connection pays
+    the setup cost, and all transfers share one link of ``bandwidth_kbps``.
+
+    Returns:
+        dict: ``{"timeline", "document_ms", "first_render_ms", "load_ms",
+              "critical_path"}``; timeline entries carry start/end in ms.
+              Subresources only depend on the document here, so
+              ``critical_path`` is the document followed by the
+              render-blocking file that arrives last.
+    """
+    connections = {}  # host -> [free_at_ms or None for an unopened connection]
+    link_free_at = 0.0
+
+    def schedule(url, size, ready_at):
+        nonlocal link_free_at
+        parts = urllib.parse.urlsplit(url)
+        slots = connections.setdefault(parts.netloc, [None] * network.connections_per_host)
+        # The connection that can start soonest; opened ones skip the handshake
+        index = min(
+            range(len(slots)),
+            key=lambda i: (max(ready_at, slots[i]) if slots[i] is not None else ready_at + network.setup_ms(parts.scheme))
+        )
+        if slots[index] is None:
+            start = ready_at
+            request_at = start + network.setup_ms(parts.scheme)
+        else:
+            start = max(ready_at, slots[index])
+            request_at = start
+        first_byte = request_at + network.rtt_ms
+        transfer_start = max(first_byte, link_free_at)
+        end = transfer_start + network.transfer_ms(size)
+        link_free_at = end
+        slots[index] = end
+        return start, end
+
+    start, document_end = schedule(document["url"], document["transfer_size"], 0.0)
+    timeline = [dict(document, start_ms=round(start), end_ms=round(document_end))]
+
+    eager = [resource for resource in resources if not resource["lazy"]]
+    ordered = [r for r in eager if r["render_blocking"]] + [r for r in eager if not r["render_blocking"]]
+    for resource in ordered:
+        start, end = schedule(resource["url"], resource["transfer_size"], document_end)
+        timeline.append(dict(resource, start_ms=round(start), end_ms=round(end)))
+
+    blocking = [entry for entry in timeline[1:] if entry["render_blocking"]]
+    first_render = max([document_end] + [entry["end_ms"] for entry in blocking])
+    critical_path = [timeline[0]["url"]]
+    if blocking:
+        critical_path.append(max(blocking, key=lambda entry: entry["end_ms"])["url"])
+    return {
+        "timeline": timeline,
+        "document_ms": round(document_end),
+        "first_render_ms": round(first_render),
+        "load_ms": max(entry["end_ms"] for entry in timeline),
+        "critical_path": critical_path
+    }
+
+
+# Function to map a measurement onto 0-100: full marks up to `good`, none from `poor` on
+def _score(value, good, poor):
+    if value <= good:
+        return 100.0
+    if value >= poor:
+        return 0.0
+    return 100.0 * (poor - value) / (poor - good)
+
+
+async def webpage_performance(url: str, html_content: Optional[str] = None, network: Optional[NetworkModel] = None, sizer: Optional[AssetSizer] = None):
+    """Page-load cost model for one page
+
+    Every file is sized concurrently (transfer and decoded bytes, compression
+    and caching headers) and the load is replayed on ``network`` to estimate
+    the render-blocking critical path and total page weight.
+
+    Args:
+        url (str): Page URL
+        html_content (str): Stored HTML; fetched when not given
+        network (NetworkModel): Connection to simulate, config defaults if None
+        sizer (AssetSizer): Sizer to use, default limits if None
+
+    Returns:
+        dict: ``numerical_data``, ``one_liner_data`` and ``total_score`` as the
+              other analyzers return them, plus ``timeline`` and ``network``
+    """
+    if not url.startswith(('http://', 'https://')):
+        url = 'https://' + url
+    network = network or NetworkModel()
+    sizer = sizer or AssetSizer()
+    if html_content is None:
+        status, html_content = await http_client.async_get_text(url)
+        if status != 200:
+            raise ValueError(f"Failed to fetch the webpage (status {status})")
+
+    # Parsing the document blocks, so it runs on the I/O pool like the other page parses
+    resources = await run_io(collect_subresources, html_content, url)
+    sizes = await sizer.size_all([url] + [resource["url"] for resource in resources])
+    document = dict(sizes[0], kind="document", render_blocking=True, lazy=False)
+    resources = [dict(size, **resource) for size, resource in zip(sizes[1:], resources)]
+
+    load = simulate_load(document, resources, network)
+
+    loaded = [document] + [resource for resource in resources if not resource["lazy"]]
+    transfer_size = sum(asset["transfer_size"] for asset in loaded)
+    decoded_size = sum(asset["decoded_size"] or 0 for asset in loaded)
+    blocking_count = sum(1 for resource in resources if resource["render_blocking"])
+    text_assets = [asset for asset in loaded if asset["kind"] in TEXT_KINDS and asset["transfer_size"]]
+    compressed = [asset for asset in text_assets if asset["content_encoding"]]
+    compressed_ratio = len(compressed) / len(text_assets) if text_assets else 1.0
+    static_assets = [asset for asset in loaded if asset["kind"] != "document" and asset["status"] == 200]
+    cacheable_ratio = sum(1 for asset in static_assets if is_cacheable(asset)) / len(static_assets) if static_assets else 1.0
+    failed = [asset["url"] for asset in loaded if asset["error"] or (asset["status"] or 0) >= 400]
+
+    # Thresholds follow common web performance budgets for mobile
+    total_score = (
+        0.30 * _score(load["first_render_ms"], 1800, 6000)
+        + 0.20 * _score(load["load_ms"], 3000, 12000)
+        + 0.20 * _score(transfer_size / 1024, 1600, 8000)
+        + 0.15 * compressed_ratio * 100
+        + 0.15 * cacheable_ratio * 100
+    )
+
+    numerical_data = {
+        "first_render_ms": {
+            "title": "Estimated First Render (ms)",
+            "value": load["first_render_ms"],
+            "details": "When the document and every render-blocking stylesheet and script have arrived."
+        },
+        "load_ms": {
+            "title": "Estimated Load Time (ms)",
+            "value": load["load_ms"],
+            "details": "When the last non-lazy file has arrived on the simulated connection."
+        },
+        "page_weight_kb": {
+            "title": "Page Weight (KB)",
+            "value": round(transfer_size / 1024, 1),
+            "details": "Bytes transferred for the document and all non-lazy files."
+        },
+        "decoded_weight_kb": {
+            "title": "Decoded Weight (KB)",
+            "value": round(decoded_size / 1024, 1),
+            "details": "Size of the same files after decompression."
+        },
+        "request_count": {
+            "title": "Requests",
+            "value": len(loaded),
+            "details": "Files fetched during the initial load, including the document."
+        },
+        "render_blocking_count": {
+            "title": "Render-blocking Files",
+            "value": blocking_count,
+            "details": "Stylesheets and synchronous head scripts that delay the first render."
+        },
+        "compressed_text_ratio": {
+            "title": "Compressed Text Files",
+            "value": round(compressed_ratio * 100),
+            "details": "Percentage of HTML, CSS and JS files served with gzip, deflate or brotli."
+        },
+        "cacheable_ratio": {
+            "title": "Cacheable Files",
+            "value": round(cacheable_ratio * 100),
+            "details": "Percentage of files with a positive max-age, Expires or a validator."
+        }
+    }
+
+    one_liner_data = [
+        {"title": "Critical Path",
+         "details": (
+             f"First render waits on the document and {blocking_count} render-blocking file(s); "
+             f"the last to arrive is {load['critical_path'][-1]} at {load['first_render_ms']} ms."
+         ) if blocking_count else f"First render only waits on the document, which arrives at {load['first_render_ms']} ms."},
+        {"title": "Render-blocking Resources",
+         "details": "Inline critical CSS and defer or async scripts so the browser can paint before they arrive."},
+        {"title": "Page Weight",
+         "details": "Every kilobyte costs transfer time on slow connections; compress and trim large files first."},
+        {"title": "Compression",
+         "details": "Text files shrink by 60-80% with gzip or brotli, cutting transfer time on every visit."},
+        {"title": "Caching",
+         "details": "Long max-age values let repeat visitors skip the network for unchanged files."},
+        {"title": "Network Model",
+         "details": f"Simulated at {network.rtt_ms:g} ms RTT, {network.bandwidth_kbps:g} kbps and {network.connections_per_host} connections per host."}
+    ]
+
+    return {
+        "numerical_data": numerical_data,
+        "one_liner_data": one_liner_data,
+        "total_score": round(total_score, 2),
+        "critical_path": load["critical_path"],
+        "failed_resources": failed,
+        "network": network.as_dict(),
+        "timeline": load["timeline"]
+    }
@@ -1,12 +1,18 @@
-import requests
-from bs4 import BeautifulSoup
+import http_client
+from html_parsing import as_soup
+from page_features import as_features
 from urllib.parse import urljoin
+import re
+from css_cache import parsed_css_cache
+
+REM_UNIT = re.compile(r'\d(?:\.\d+)?rem\b')
+EM_UNIT = re.compile(r'\d(?:\.\d+)?em\b')
 
 # Function to fetch the webpage
 def fetch_webpage(url):
     if not url.startswith(('http://', 'https://')):
         url = 'https://' + url
-    response = requests.get(url)
+    response = http_client.get(url)
     if response.status_code == 200:
         return response.text
     else:
@@ -14,19 +20,19 @@ def fetch_webpage(url):
 
 # Function to parse the HTML content
 def parse_html(html_content):
-    soup = BeautifulSoup(html_content, 'html.parser')
+    soup = as_soup(html_content)
     return soup
 
-# Function to extract image information
-def extract_images(soup):
-    images = soup.find_all('img')
+# Function to extract image information (from HTML, a parsed tree or a page feature record)
+def extract_images(document):
+    images = as_features(document)["images"]
     image_info = []
     for img in images:
-        src = img.get('src')
-        srcset = img.get('srcset')
-        sizes = img.get('sizes')
+        src = img['src']
+        srcset = img['srcset']
+        sizes = img['sizes']
         format = src.split('.')[-1].lower() if src else 'unknown'
-        lazy = 'loading' in img.attrs and img.attrs['loading'] == 'lazy'
+        lazy = img['loading'] == 'lazy'
         image_info.append({'src': src, 'srcset': srcset, 'sizes': sizes, 'format': format, 'lazy': lazy})
     return image_info
 
@@ -44,14 +50,13 @@ def evaluate_image_formats(image_info):
     return evaluation
 
 # Function to extract meta tags
-def extract_meta_tags(soup):
-    meta_tags = soup.find_all('meta', attrs={'name': 'viewport'})
-    return [meta.get('content') for meta in meta_tags]
+def extract_meta_tags(document):
+    return as_features(document)["viewport"]
 
 # Function to evaluate viewport meta tag
 def evaluate_viewport_meta(meta_tags):
     for tag in meta_tags:
-        if 'width=device-width' in tag and 'initial-scale=1' in tag:
+        if tag and 'width=device-width' in tag and 'initial-scale=1' in tag:
             return "Viewport meta tag is set correctly.", 10
     return "Viewport meta tag is missing or incorrect.", 0
 
@@ -78,75 +83,94 @@ def extract_css(soup, base_url):
         href = link.get('href')
         if href:
             full_url = urljoin(base_url, href)
-            css_content.append(requests.get(full_url).text)
+            css_content.append(http_client.get(full_url).text)
     return css_content
 
+# Function to summarise CSS with the streaming parser; responsive() computes it once
+# and hands it to every evaluation below
+def css_statistics(css_content):
+    stats = {"media": 0, "flex": 0, "grid": 0, "rem": 0, "em": 0}
+    for css in css_content:
+        parsed = parsed_css_cache.get(css)
+        at_rule_counts = parsed["at_rule_counts"]
+        for rule in parsed["rules"]:
+            for name, value in rule['properties'].items():
+                if name == 'display':
+                    if value in ('flex', 'inline-flex'):
+                        stats["flex"] += 1
+                    elif value in ('grid', 'inline-grid'):
+                        stats["grid"] += 1
+                stats["rem"] += len(REM_UNIT.findall(value))
+                stats["em"] += len(EM_UNIT.findall(value))
+        stats["media"] += at_rule_counts.get("media", 0)
+    return stats
+
 # Function to evaluate media queries
-def evaluate_media_queries(css_content):
-    media_query_count = sum(css.count('@media') for css in css_content)
+def evaluate_media_queries(css_content, stats=None):
+    media_query_count = (stats or css_statistics(css_content))["media"]
     if media_query_count > 0:
         return f"Media queries are used ({media_query_count} found).", 10
     return "Media queries are not used.", 0
 
 # Function to evaluate flexible grid layouts
-def evaluate_flexible_layouts(css_content):
-    flex_count = sum(css.count('display: flex') for css in css_content)
-    grid_count = sum(css.count('display: grid') for css in css_content)
+def evaluate_flexible_layouts(css_content, stats=None):
+    stats = stats or css_statistics(css_content)
+    flex_count, grid_count = stats["flex"], stats["grid"]
     if flex_count > 0 or grid_count > 0:
         return f"Flexible layouts are used (Flex: {flex_count}, Grid: {grid_count}).", 10
     return "Flexible layouts are not used.", 0
 
 # Function to evaluate touch-friendly design
-def evaluate_touch_friendly(soup):
-    buttons = soup.find_all('button')
-    links = soup.find_all('a')
-    touch_friendly_count = sum(1 for btn in buttons if btn.get('style') and 'padding' in btn.get('style'))
-    touch_friendly_count += sum(1 for link in links if link.get('style') and 'padding' in link.get('style'))
+def evaluate_touch_friendly(document):
+    touch_friendly_count = as_features(document)["touch_friendly_count"]
     if touch_friendly_count > 0:
         return f"Touch-friendly design is used ({touch_friendly_count} elements).", 10
     return "Touch-friendly design is not used.", 0
 
 # Function to evaluate responsive typography
-def evaluate_responsive_typography(css_content):
-    rem_count = sum(css.count('rem') for css in css_content)
-    em_count = sum(css.count('em') for css in css_content)
+def evaluate_responsive_typography(css_content, stats=None):
+    stats = stats or css_statistics(css_content)
+    rem_count, em_count = stats["rem"], stats["em"]
     if rem_count > 0 or em_count > 0:
         return f"Responsive typography is used (rem: {rem_count}, em: {em_count}).", 10
     return "Responsive typography is not used.", 0
 
 # Main function
-def responsive(html_content, css_content):
-    soup = BeautifulSoup(html_content, 'html.parser')
+def responsive(document, css_content):
+    # A stored page feature record is used as is; HTML or a tree is indexed once here
+    features = as_features(document)
 
     # Evaluate Viewport Meta Tag
-    meta_tags = extract_meta_tags(soup)
+    meta_tags = extract_meta_tags(features)
     viewport_evaluation, viewport_score = evaluate_viewport_meta(meta_tags)
 
     # Evaluate Responsive Images
-    image_info = extract_images(soup)
+    image_info = extract_images(features)
     responsive_images_evaluation, responsive_images_score = evaluate_responsive_images(image_info)
 
     # Evaluate Lazy Loading
     lazy_loading_evaluation, lazy_loading_score = evaluate_lazy_loading(image_info)
 
+    # Every stylesheet is summarised once for the three CSS evaluations
+    css_stats = css_statistics(css_content)
+
     # Evaluate Media Queries
-    media_queries_evaluation, media_queries_score = evaluate_media_queries(css_content)
-    media_query_count = sum(css.count('@media') for css in css_content)
+    media_queries_evaluation, media_queries_score = evaluate_media_queries(css_content, css_stats)
+    media_query_count = css_stats["media"]
 
     # Evaluate Flexible Layouts
-    flexible_layouts_evaluation, flexible_layouts_score = evaluate_flexible_layouts(css_content)
-    flex_count = sum(css.count('display: flex') for css in css_content)
-    grid_count = sum(css.count('display: grid') for css in css_content)
+    flexible_layouts_evaluation, flexible_layouts_score = evaluate_flexible_layouts(css_content, css_stats)
+    flex_count = css_stats["flex"]
+    grid_count = css_stats["grid"]
 
     # Evaluate Touch-Friendly Design
-    touch_friendly_evaluation, touch_friendly_score = evaluate_touch_friendly(soup)
-    touch_friendly_count = sum(1 for btn in soup.find_all('button') if btn.get('style') and 'padding' in btn.get('style'))
-    touch_friendly_count += sum(1 for link in soup.find_all('a') if link.get('style') and 'padding' in link.get('style'))
+    touch_friendly_evaluation, touch_friendly_score = evaluate_touch_friendly(features)
+    touch_friendly_count = features["touch_friendly_count"]
 
     # Evaluate Responsive Typography
-    responsive_typography_evaluation, responsive_typography_score = evaluate_responsive_typography(css_content)
-    rem_count = sum(css.count('rem') for css in css_content)
-    em_count = sum(css.count('em') for css in css_content)
+    responsive_typography_evaluation, responsive_typography_score = evaluate_responsive_typography(css_content, css_stats)
+    rem_count = css_stats["rem"]
+    em_count = css_stats["em"]
 
     # Evaluate Image Formats
     image_format_evaluation = evaluate_image_formats(image_info)
@@ -0,0 +1,35 @@
+import requests
+import http_client
+
+def is_valid_robots_content(content):
+    # Basic validation for common robots.txt lines (User-agent, Disallow, Allow, Sitemap)
+    lines = content.splitlines()
+    for line in lines:
+        if line.strip().startswith(("User-agent", "Disallow", "Allow", "Sitemap", "Crawl-delay", "Host")):
+            return True
+    return False
+
+def check_robots_txt(base_url):
+    robots_url = base_url + "/robots.txt"
+
+    try:
+        # The shared client sends a browser User-Agent with every request
+        response = http_client.get(robots_url, allow_redirects=True)
+
+        # Check if the status code is 200 (OK)
+        if response.status_code == 200:
+            # Check if the content of the robots.txt follows standard patterns
+            if is_valid_robots_content(response.text):
+                return True
+            else:
+                return False  # Not a valid robots.txt format
+        elif response.status_code == 404:
+            return "robots.txt file not found"
+        elif response.status_code == 403:
+            return "access to robots.txt is forbidden"
+        elif response.status_code == 529:
+            return "server error"
+        else:
+            return f"unexpected status code: {response.status_code}"
+    except requests.RequestException as e:
+        return f"Error checking robots.txt: {e}"
@@ -0,0 +1,105 @@
+import re
+from collections import defaultdict
+from typing import Dict, List, Optional
+
+# Splits a selector on top-level commas / combinators, ignoring anything
+# inside (...) or [...], e.g. `:not(.a, .b)` or `[data-x="a b"]`.
+def _split_top_level(selector: str, separators: str) -> List[str]:
+    parts, depth, current = [], 0, []
+    for char in selector:
+        if char in "([":
+            depth += 1
+        elif char in ")]":
+            depth = max(0, depth - 1)
+        if depth == 0 and char in separators:
+            parts.append("".join(current))
+            current = []
+        else:
+            current.append(char)
+    parts.append("".join(current))
+    return [part.strip() for part in parts if part.strip()]
+
+
+COMPOUND_PART = re.compile(r"([#.]?)((?:\\.|[\w-])+)|(\[[^\]]*\])|(::?[\w-]+(?:\([^)]*\))?)|(\*)")
+
+
+class CompoundSelector:
+    """The rightmost compound of a complex selector, e.g. ``a.btn#go`` in ``nav > a.btn#go:hover``
+
+    Only the tag, ids and classes are checked; attribute selectors,
+    pseudo-classes and ancestors are not evaluated.
+    """
+
+    __slots__ = ("tag", "ids", "classes")
+
+    def __init__(self, text: str):
+        self.tag: Optional[str] = None
+        self.ids: List[str] = []
+        self.classes: List[str] = []
+        for prefix, name, _attribute, pseudo, _star in COMPOUND_PART.findall(text):
+            if pseudo == ":root" and self.tag is None:
+                self.tag = "html"
+            if not name:
+                continue
+            if prefix == "#":
+                self.ids.append(name)
+            elif prefix == ".":
+                self.classes.append(name)
+            elif self.tag is None:
+                self.tag = name.lower()
+
+    def matches(self, tag: str, element_id: Optional[str], element_classes) -> bool:
+        if self.tag is not None and self.tag != tag:
+            return False
+        if self.ids and any(selector_id != element_id for selector_id in self.ids):
+            return False
+        return all(name in element_classes for name in self.classes)
+
+
+class RuleIndex:
+    """CSS rules bucketed by the id, class or tag of their rightmost compound selector
+
+    Built once per stylesheet set. Looking up an element only touches rules
+    whose key the element actually has (plus universal rules), instead of
+    scanning every rule.
+    """
+
+    def __init__(self, css_rules: List[Dict]):
+        self.by_id = defaultdict(list)
+        self.by_class = defaultdict(list)
+        self.by_tag = defaultdict(list)
+        self.universal = []
+        for position, rule in enumerate(css_rules):
+            for complex_selector in _split_top_level(rule["selector"], ","):
+                compounds = _split_top_level(complex_selector, " >+~")
+                if not compounds:
+                    continue
+                compound = CompoundSelector(compounds[-1])
+                entry = (position, compound, rule)
+                if compound.ids:
+                    self.by_id[compound.ids[0]].append(entry)
+                elif compound.classes:
+                    self.by_class[compound.classes[0]].append(entry)
+                elif compound.tag is not None:
+                    self.by_tag[compound.tag].append(entry)
+                else:
+                    self.universal.append(entry)
+
+    def matching_rules(self, element) -> List[Dict]:
+        """Rules whose selector matches ``element``, in stylesheet order"""
+        element_id = element.get("id")
+        element_classes = element.get("class") or []
+        if isinstance(element_classes, str):
+            element_classes = element_classes.split()
+        candidates = list(self.by_tag.get(element.name, ()))
+        candidates.extend(self.universal)
+        if element_id:
+            candidates.extend(self.by_id.get(element_id, ()))
+        for name in element_classes:
+            candidates.extend(self.by_class.get(name, ()))
+
+        matched = {}
+        for position, compound, rule in candidates:
+            if position not in matched and compound.matches(element.name, element_id, element_classes):
+                matched[position] = rule
+        return [matched[position] for position in sorted(matched)]
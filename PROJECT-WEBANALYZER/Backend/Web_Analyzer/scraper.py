@@ -1,50 +1,161 @@
 import re
 import urllib.parse
-from typing import List, Dict, Optional, Tuple
+from typing import Callable, Optional, List, Dict, Tuple
 import requests
 from bs4 import BeautifulSoup
 
-import re
-import urllib.parse
-from typing import Optional, List, Dict, Tuple
-import requests
-from bs4 import BeautifulSoup
+import config
+from html_parsing import make_soup
+import http_client
+from css_cache import parsed_css_cache
+from css_vars import VarResolver
+from rule_index import RuleIndex
+from stylesheet_fetcher import fetch_stylesheets
 
-def extract_css_from_webpage(
-    url: str, request_kwargs: Optional[dict] = None, verbose: bool = False
-) -> Tuple[List[str], List[str], List[Dict[str, str]]]:
-    """Extracts CSS from webpage
+class PageSnapshot:
+    """A single download of a webpage and its external stylesheets
+
+    Every step of a scrape reads from the same snapshot, so the page and each
+    stylesheet are fetched exactly once.
+
+    Attributes:
+        url (str): URL that was requested
+        final_url (str): URL after redirects, used to resolve relative links
+        content (bytes): Raw response body
+        headers (dict): Response headers
+        status_code (int): HTTP status of the page response
+        stylesheets (list[dict]): One StylesheetFetcher result for every
+                                  ``<link rel=stylesheet>``, in document order,
+                                  with ``@import`` chains inlined
+    """
+
+    def __init__(self, url: str, final_url: str, content: bytes, headers: Dict[str, str], status_code: int):
+        self.url = url
+        self.final_url = final_url
+        self.content = content
+        self.headers = headers
+        self.status_code = status_code
+        self.stylesheets: List[Dict[str, str]] = []
+        self._soup: Optional[BeautifulSoup] = None
+
+    @property
+    def not_modified(self) -> bool:
+        """True when a conditional fetch was answered with 304; there is no body"""
+        return self.status_code == 304
+
+    @property
+    def validators(self) -> Dict[str, Optional[str]]:
+        return {"etag": self.headers.get("ETag"), "last_modified": self.headers.get("Last-Modified")}
+
+    @property
+    def soup(self) -> BeautifulSoup:
+        """Parsed HTML, built on first access and shared afterwards"""
+        if self._soup is None:
+            self._soup = make_soup(self.content)
+        return self._soup
+
+
+def fetch_page_snapshot(
+    url: str,
+    request_kwargs: Optional[dict] = None,
+    verbose: bool = False,
+    validators: Optional[Dict[str, Optional[str]]] = None,
+    load_stylesheet_validators: Optional[Callable[[List[str]], Dict[str, dict]]] = None,
+    shared_stylesheets: Optional[Dict[str, dict]] = None,
+) -> PageSnapshot:
+    """Downloads a webpage and all of its external stylesheets once
 
     Args:
         url (str): Webpage URL
-        request_kwargs (dict): These arguments are passed to requests.get() (when
-                                fetching webpage HTML and external stylesheets)
+        request_kwargs (dict): These arguments are passed to http_client.get() when
+                                fetching the webpage HTML; ``headers`` and
+                                ``timeout`` also apply to external stylesheets
         verbose (bool): Print diagnostic information
+        validators (dict): ``etag``/``last_modified`` saved from the previous
+                           fetch of this page; when the server answers 304 the
+                           returned snapshot has ``not_modified`` set and
+                           nothing else is downloaded
+        load_stylesheet_validators (callable): Given the stylesheet URLs,
+                           returns stored validators and CSS for them so
+                           unchanged stylesheets are revalidated, not re-downloaded
+        shared_stylesheets (dict): Stylesheets already fetched for other pages
+                           of the same site, see StylesheetFetcher.fetch_all
 
     Returns:
-        tuple[ list[str], list[str], list[dict] ]: css_from_external_stylesheets, css_from_style_tags, inline_css
+        PageSnapshot: the downloaded page
     """
 
-    if not request_kwargs:
-        request_kwargs = {
-            "timeout": 10,
-            "headers": {"User-Agent": "Definitely not an Automated Script"},
-        }
-    url_response = requests.get(url, **request_kwargs)
+    request_kwargs = dict(request_kwargs or {})
+    conditional = http_client.conditional_headers(validators)
+    if conditional:
+        request_kwargs["headers"] = {**request_kwargs.get("headers", {}), **conditional}
+    url_response = http_client.get(url, **request_kwargs)
+    if url_response.status_code == 304 and conditional:
+        return PageSnapshot(
+            url=url,
+            final_url=url_response.url,
+            content=b"",
+            headers=dict(url_response.headers),
+            status_code=304,
+        )
     if url_response.status_code != 200:
         raise requests.exceptions.HTTPError(
             f"received response [{url_response.status_code}] from [{url}]"
         )
 
-    soup = BeautifulSoup(url_response.content, "html.parser")
+    snapshot = PageSnapshot(
+        url=url,
+        final_url=url_response.url,
+        content=url_response.content,
+        headers=dict(url_response.headers),
+        status_code=url_response.status_code,
+    )
+
+    css_urls = [
+        urllib.parse.urljoin(snapshot.final_url, link["href"])
+        for link in snapshot.soup.find_all("link", rel="stylesheet")
+        if link.get("href")
+    ]
+    if verbose:
+        print(f"downloading {len(css_urls):,} external CSS stylesheets")
+    # Stylesheets are downloaded concurrently; results keep document order
+    stylesheet_validators = load_stylesheet_validators(css_urls) if load_stylesheet_validators else None
+    snapshot.stylesheets = fetch_stylesheets(
+        css_urls,
+        stylesheet_validators,
+        shared_stylesheets,
+        headers={k: v for k, v in request_kwargs.get("headers", {}).items() if k not in conditional},
+        timeout=request_kwargs.get("timeout", config.STYLESHEET_FETCH_TIMEOUT),
+    )
+
+    return snapshot
+
 
-    css_from_external_stylesheets: List[str] = []
-    for link in soup.find_all("link", rel="stylesheet"):
-        css_url = urllib.parse.urljoin(url, link["href"])
-        if verbose:
-            print(f"downloading external CSS stylesheet {css_url}")
-        css_content: str = requests.get(css_url, **request_kwargs).text
-        css_from_external_stylesheets.append(css_content)
+def extract_css_from_webpage(
+    url: str,
+    request_kwargs: Optional[dict] = None,
+    verbose: bool = False,
+    snapshot: Optional[PageSnapshot] = None,
+) -> Tuple[List[str], List[str], List[Dict[str, str]]]:
+    """Extracts CSS from webpage
+
+    Args:
+        url (str): Webpage URL
+        request_kwargs (dict): Passed to fetch_page_snapshot() when no snapshot
+                                is given
+        verbose (bool): Print diagnostic information
+        snapshot (PageSnapshot): Already downloaded page; when given nothing is
+                                 fetched again
+
+    Returns:
+        tuple[ list[str], list[str], list[dict] ]: css_from_external_stylesheets, css_from_style_tags, inline_css
+    """
+
+    if snapshot is None:
+        snapshot = fetch_page_snapshot(url, request_kwargs, verbose)
+    soup = snapshot.soup
+
+    css_from_external_stylesheets: List[str] = [sheet["css"] for sheet in snapshot.stylesheets]
 
     css_from_style_tags: List[str] = []
     for style_tag in soup.find_all("style"):
@@ -67,18 +178,9 @@ def extract_css_from_webpage(
     return css_from_external_stylesheets, css_from_style_tags, inline_css
 
 def parse_css_rules(css: str) -> List[Dict[str, str]]:
-    rules = []
-    pattern = re.compile(r'([^{]+)\{([^}]+)\}')
-    for match in pattern.finditer(css):
-        selector = match.group(1).strip()
-        properties = match.group(2).strip().split(';')
-        rule = {'selector': selector, 'properties': {}}
-        for prop in properties:
-            if ':' in prop:
-                name, value = prop.split(':', 1)  # Split only on the first colon
-                rule['properties'][name.strip()] = value.strip()
-        rules.append(rule)
-    return rules
+    # Single-pass tokenizer behind a content-hash cache; rules inside
+    # @media / @supports keep that context. The returned list is shared.
+    return parsed_css_cache.rules(css)
 
 def extract_all_vars(css_rules: List[Dict[str, str]]) -> Dict[str, str]:
     var_pattern = re.compile(r'--[\w-]+')
@@ -89,46 +191,95 @@ def extract_all_vars(css_rules: List[Dict[str, str]]) -> Dict[str, str]:
                 all_vars[prop] = value
     return all_vars
 
-def resolve_nested_vars(value: str, all_vars: Dict[str, str]) -> str:
-    while value.startswith('var('):
-        var_name = value[4:-1].strip()
-        if var_name in all_vars:
-            value = all_vars[var_name]
-        else:
-            break
-    return value
+def resolve_nested_vars(value: str, all_vars) -> str:
+    # Accepts a prebuilt VarResolver so repeated lookups hit its memo table
+    resolver = all_vars if isinstance(all_vars, VarResolver) else VarResolver(all_vars)
+    return resolver.resolve_value(value)
 
-def replace_vars_with_values(properties: Dict[str, Optional[str]], all_vars: Dict[str, str]) -> Dict[str, Optional[str]]:
+def replace_vars_with_values(properties: Dict[str, Optional[str]], all_vars) -> Dict[str, Optional[str]]:
+    resolver = all_vars if isinstance(all_vars, VarResolver) else VarResolver(all_vars)
     for prop, value in properties.items():
         if value:
-            properties[prop] = resolve_nested_vars(value, all_vars)
+            properties[prop] = resolver.resolve_value(value)
     return properties
 
 def extract_typography_properties(element, css_rules, properties_to_extract: List[str], all_vars: Dict[str, str]) -> Dict[str, Optional[str]]:
+    # Pass a prebuilt RuleIndex when calling this for many elements
+    if not isinstance(css_rules, RuleIndex):
+        css_rules = RuleIndex(css_rules)
     properties = {prop: None for prop in properties_to_extract}
-    for rule in css_rules:
-        if element.name in rule['selector']:
-            for prop in properties.keys():
-                if properties[prop] is None and prop in rule['properties']:
-                    properties[prop] = rule['properties'][prop]
+    for rule in css_rules.matching_rules(element):
+        for prop in properties.keys():
+            if properties[prop] is None and prop in rule['properties']:
+                properties[prop] = rule['properties'][prop]
     # Replace var() with actual values from all_vars
     properties = replace_vars_with_values(properties, all_vars)
     return properties
 
-def find_properties(url: str, properties_to_extract: List[str]) -> Dict[str, Dict[str, Optional[str]]]:
-    css_from_external_stylesheets, css_from_style_tags, inline_css = extract_css_from_webpage(url)
+def element_signature(element) -> Tuple[str, Tuple[str, ...], Optional[str], Optional[str]]:
+    """(tag, sorted classes, id, inline style): elements sharing it get the same properties"""
+    classes = element.get("class") or []
+    if isinstance(classes, str):
+        classes = classes.split()
+    return element.name, tuple(sorted(classes)), element.get("id"), element.get("style")
+
+def signature_key(signature) -> str:
+    """Readable form of an element signature, e.g. ``div.card.wide#main[style="..."]``"""
+    tag, classes, element_id, style = signature
+    key = tag + "".join(f".{name}" for name in classes)
+    if element_id:
+        key += f"#{element_id}"
+    if style:
+        key += f'[style="{style}"]'
+    return key
+
+def find_properties(
+    url: str,
+    properties_to_extract: List[str],
+    snapshot: Optional[PageSnapshot] = None,
+    parse_stylesheet: Callable[[str], List[Dict[str, str]]] = parse_css_rules,
+    by_signature: bool = False,
+) -> Dict[str, Dict[str, Optional[str]]]:
+    """``parse_stylesheet`` turns an external stylesheet into rules; pass a
+    StylesheetStore's ``rules_for`` to reuse rules parsed for other pages.
+
+    Properties are computed once per distinct element signature. By default
+    the result is keyed by tag name (the last element of each tag wins); with
+    ``by_signature`` it is keyed by signature_key() and each entry carries
+    ``tag``, ``count`` and ``properties``."""
+    if snapshot is None:
+        snapshot = fetch_page_snapshot(url)
+    css_from_external_stylesheets, css_from_style_tags, inline_css = extract_css_from_webpage(url, snapshot=snapshot)
 
     css_rules = []
-    for css in css_from_external_stylesheets + css_from_style_tags:
+    for css in css_from_external_stylesheets:
+        if css:  # Failed downloads come back empty
+            css_rules.extend(parse_stylesheet(css))
+    for css in css_from_style_tags:
         css_rules.extend(parse_css_rules(css))
 
-    # Extract all variables
-    all_vars = extract_all_vars(css_rules)
+    # Resolve every custom property once; elements then only do lookups
+    all_vars = VarResolver(extract_all_vars(css_rules))
 
-    soup = BeautifulSoup(requests.get(url).content, "html.parser")
+    # Built once so each element only looks at rules that can match it
+    rule_index = RuleIndex(css_rules)
+
+    soup = snapshot.soup
+    computed = {}
+    counts = {}
     elements_properties = {}
     for element in soup.find_all(True):
-        properties = extract_typography_properties(element, css_rules, properties_to_extract, all_vars)
-        elements_properties[element.name] = properties
+        signature = element_signature(element)
+        if signature not in computed:
+            computed[signature] = extract_typography_properties(element, rule_index, properties_to_extract, all_vars)
+            counts[signature] = 0
+        counts[signature] += 1
+        if not by_signature:
+            elements_properties[element.name] = dict(computed[signature])
 
+    if by_signature:
+        return {
+            signature_key(signature): {"tag": signature[0], "count": counts[signature], "properties": properties}
+            for signature, properties in computed.items()
+        }
     return elements_properties
@@ -0,0 +1,154 @@
+import asyncio
+import re
+import urllib.parse
+from collections import defaultdict
+from typing import Dict, List, Optional
+
+import aiohttp
+
+import config
+import http_client
+
+# @import rules may only appear before the first style rule, optionally
+# separated by comments, e.g. `@import url("base.css") screen;`
+IMPORT_PATTERN = re.compile(
+    r"""/\*.*?\*/|@import\s+(?:url\(\s*)?(['"]?)([^'")\s;]+)\1\s*\)?\s*([^;]*);""",
+    re.S,
+)
+
+
+class StylesheetFetcher:
+    """Downloads external stylesheets concurrently over the shared connection pool
+
+    Results come back in the order the URLs were given, so cascade order is
+    preserved. ``@import`` rules inside fetched CSS are followed and inlined
+    in place of the rule (wrapped in ``@media`` when the import carries a
+    media query).
+
+    Args:
+        max_concurrency (int): Maximum downloads in flight across all hosts
+        per_host (int): Maximum downloads in flight to a single host
+        timeout (float): Per-request timeout in seconds
+        max_import_depth (int): How deep ``@import`` chains are followed
+        headers (dict): Extra headers sent with every request
+    """
+
+    def __init__(
+        self,
+        max_concurrency: int = config.STYLESHEET_FETCH_CONCURRENCY,
+        per_host: int = config.STYLESHEET_FETCH_PER_HOST,
+        timeout: float = config.STYLESHEET_FETCH_TIMEOUT,
+        max_import_depth: int = config.STYLESHEET_MAX_IMPORT_DEPTH,
+        headers: Optional[Dict[str, str]] = None,
+    ):
+        self.max_concurrency = max_concurrency
+        self.per_host = per_host
+        self.timeout = timeout
+        self.max_import_depth = max_import_depth
+        self.headers = headers
+
+    async def fetch_all(
+        self, urls: List[str], validators: Optional[Dict[str, dict]] = None, shared: Optional[Dict[str, dict]] = None
+    ) -> List[Dict[str, Optional[str]]]:
+        """Fetches every URL, revalidating the ones with stored validators
+
+        Args:
+            urls (list[str]): Stylesheet URLs in document order
+            validators (dict): ``{url: {"etag", "last_modified", "css"}}`` from
+                               an earlier fetch; a 304 answer reuses ``css``
+            shared (dict): ``{url: result}`` of stylesheets other pages of the
+                           site already fetched; these are not requested again
+                           and successful downloads are added to it
+
+        Returns:
+            list[dict]: ``{"url", "css", "error", "etag", "last_modified",
+                        "not_modified"}`` per URL, in the order given
+        """
+        # Limits belong to this call; overlapping calls on one fetcher each get their own
+        slots = (asyncio.Semaphore(self.max_concurrency), defaultdict(lambda: asyncio.Semaphore(self.per_host)))
+        validators = validators or {}
+        if shared is None:
+            return await asyncio.gather(*(self._fetch_sheet(slots, url, (), validators.get(url)) for url in urls))
+        return await asyncio.gather(*(self._fetch_shared(slots, url, validators.get(url), shared) for url in urls))
+
+    async def _fetch_shared(self, slots: tuple, url: str, cached: Optional[dict], shared: Dict[str, dict]) -> Dict[str, Optional[str]]:
+        sheet = shared.get(url)
+        if sheet is None:
+            sheet = await self._fetch_sheet(slots, url, (), cached)
+            if not sheet["error"]:
+                shared[url] = sheet
+        return sheet
+
+    async def _download(self, slots: tuple, url: str, cached: Optional[dict] = None):
+        headers = dict(self.headers or {})
+        # Only revalidate when there is a stored body to fall back on
+        if cached and cached.get("css") is not None:
+            headers.update(http_client.conditional_headers(cached))
+        global_slots, host_slots = slots
+        host = urllib.parse.urlparse(url).netloc
+        async with global_slots, host_slots[host]:
+            async with http_client.request(
+                "GET", url, headers=headers, timeout=aiohttp.ClientTimeout(total=self.timeout)
+            ) as response:
+                if response.status == 304 or not 200 <= response.status < 300:
+                    # Error pages are never read as CSS
+                    return response.status, None, response.headers
+                return response.status, await response.text(errors="replace"), response.headers
+
+    async def _fetch_sheet(self, slots: tuple, url: str, chain: tuple, cached: Optional[dict] = None) -> Dict[str, Optional[str]]:
+        try:
+            status, css, headers = await self._download(slots, url, cached)
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            return {"url": url, "css": "", "error": str(e) or type(e).__name__}
+        if status == 304:
+            # Stored CSS already has its @import chain inlined
+            return {
+                "url": url,
+                "css": cached["css"],
+                "error": None,
+                "etag": headers.get("ETag") or cached.get("etag"),
+                "last_modified": headers.get("Last-Modified") or cached.get("last_modified"),
+                "not_modified": True,
+            }
+        if not 200 <= status < 300:
+            return {"url": url, "css": "", "error": f"HTTP {status}"}
+        css = await self._inline_imports(slots, url, css, chain + (url,))
+        return {
+            "url": url,
+            "css": css,
+            "error": None,
+            "etag": headers.get("ETag"),
+            "last_modified": headers.get("Last-Modified"),
+            "not_modified": False,
+        }
+
+    async def _inline_imports(self, slots: tuple, url: str, css: str, chain: tuple) -> str:
+        first_block = css.find("{")
+        prelude = css if first_block == -1 else css[:first_block]
+        imports = [m for m in IMPORT_PATTERN.finditer(prelude) if m.group(2)]
+        if not imports:
+            return css
+
+        async def resolve(match):
+            import_url = urllib.parse.urljoin(url, match.group(2))
+            if import_url in chain or len(chain) > self.max_import_depth:
+                return ""
+            imported = (await self._fetch_sheet(slots, import_url, chain))["css"]
+            media = match.group(3).strip()
+            return f"@media {media} {{\n{imported}\n}}" if media else imported
+
+        replacements = await asyncio.gather(*(resolve(m) for m in imports))
+        pieces, last = [], 0
+        for match, replacement in zip(imports, replacements):
+            pieces.append(css[last:match.start()])
+            pieces.append(replacement)
+            last = match.end()
+        pieces.append(css[last:])
+        return "".join(pieces)
+
+
+def fetch_stylesheets(
+    urls: List[str], validators: Optional[Dict[str, dict]] = None, shared: Optional[Dict[str, dict]] = None, **fetcher_kwargs
+) -> List[Dict[str, Optional[str]]]:
+    """Synchronous wrapper around StylesheetFetcher.fetch_all"""
+    return http_client.run_sync(StylesheetFetcher(**fetcher_kwargs).fetch_all(urls, validators, shared))
@@ -0,0 +1,81 @@
+import datetime
+from typing import Dict, List, Optional
+
+from sqlalchemy.orm import Session
+
+from css_cache import content_hash
+from database import Stylesheet, StylesheetRecord, upsert_statement
+from scraper import parse_css_rules
+
+
+class StylesheetStore:
+    """Content-addressed stylesheet table for one DB session
+
+    Stylesheets are keyed by the sha256 of their text, so a framework bundle
+    shared by every page of a site is stored and parsed once no matter how
+    many pages (or URLs) reference it. New entries are staged until
+    ``flush`` and committed with the caller's transaction. Writes are
+    upserts, so concurrent scrapes of pages sharing a stylesheet do not
+    collide.
+    """
+
+    def __init__(self, db: Session):
+        self.db = db
+        self._known: Dict[str, List[dict]] = {}
+        self._pending: Dict[str, Stylesheet] = {}
+
+    def add(self, css: str) -> str:
+        """Makes sure ``css`` is in the store and returns its hash"""
+        self.rules_for(css)
+        return content_hash(css)
+
+    def rules_for(self, css: str) -> List[dict]:
+        """Parsed rules for ``css``, parsing only if the store has never seen it"""
+        key = content_hash(css)
+        if key in self._known:
+            return self._known[key]
+        row = self.db.get(Stylesheet, key)
+        if row is not None:
+            rules = row.rules
+        else:
+            rules = parse_css_rules(css)
+            self._pending[key] = Stylesheet(content_hash=key, css=css, rules=rules)
+        self._known[key] = rules
+        return rules
+
+    def css_for(self, keys: List[str]) -> Dict[str, Optional[str]]:
+        rows = self.db.query(Stylesheet.content_hash, Stylesheet.css).filter(Stylesheet.content_hash.in_(keys))
+        found = {key: css for key, css in rows}
+        found.update({key: row.css for key, row in self._pending.items() if key in keys})
+        return found
+
+    def flush(self):
+        # Kept staged until the caller commits, so a retried transaction writes them again
+        if not self._pending:
+            return
+        statement = upsert_statement(self.db, Stylesheet).values([
+            {"content_hash": row.content_hash, "css": row.css, "rules": row.rules, "created_at": datetime.datetime.utcnow()}
+            for row in self._pending.values()
+        ])
+        self.db.execute(statement.on_conflict_do_nothing(index_elements=["content_hash"]))
+
+    def save_records(self, stylesheets: List[dict], hashes: List[Optional[str]], now: datetime.datetime):
+        """Stores the validators and content hash of each downloaded stylesheet URL"""
+        records = {
+            sheet["url"]: {
+                "url": sheet["url"],
+                "etag": sheet.get("etag"),
+                "last_modified": sheet.get("last_modified"),
+                "content_hash": sheet_hash,
+                "fetched_at": now,
+            }
+            for sheet, sheet_hash in zip(stylesheets, hashes)
+            if not sheet.get("error")
+        }
+        if not records:
+            return
+        statement = upsert_statement(self.db, StylesheetRecord).values(list(records.values()))
+        self.db.execute(statement.on_conflict_do_update(
+            index_elements=["url"],
+            set_={column: statement.excluded[column] for column in ("etag", "last_modified", "content_hash", "fetched_at")}
+        ))
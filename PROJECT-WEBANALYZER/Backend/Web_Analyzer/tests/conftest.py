@@ -0,0 +1,7 @@
+import os
+import sys
+import tempfile
+
+# The models are bound to DATABASE_URL when database is first imported
+os.environ["DATABASE_URL"] = "sqlite:///" + os.path.join(tempfile.mkdtemp(), "test.db")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
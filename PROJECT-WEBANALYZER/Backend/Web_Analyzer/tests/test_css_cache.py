@@ -0,0 +1,37 @@
+import tempfile
+
+from css_cache import ParsedCssCache, combine_stats
+
+CSS = "@media (max-width: 600px) { .nav { display: flex; } } .title { color: red; }"
+
+
+def test_parsing_the_same_css_twice_is_one_hit():
+    cache = ParsedCssCache(directory=tempfile.mkdtemp())
+    first = cache.get(CSS)
+    second = cache.get(CSS)
+
+    assert second is first
+    stats = cache.stats()
+    assert stats["misses"] == 1
+    assert stats["hits"] == 1
+    assert stats["memory_hits"] == 1
+    assert stats["hit_rate"] == 0.5
+
+
+def test_a_second_process_reads_the_disk_tier():
+    directory = tempfile.mkdtemp()
+    ParsedCssCache(directory=directory).get(CSS)
+    other = ParsedCssCache(directory=directory)
+
+    assert other.rules(CSS)[0]["media"] == "(max-width: 600px)"
+    assert other.stats()["disk_hits"] == 1
+
+
+def test_combined_stats_add_up_every_process():
+    server, worker = ParsedCssCache(directory=tempfile.mkdtemp()), ParsedCssCache(directory=tempfile.mkdtemp())
+    server.get(CSS)
+    worker.get(CSS)
+    worker.get(CSS)
+
+    total = combine_stats([server.stats(), worker.stats()])
+    assert (total["misses"], total["hits"], total["memory_entries"]) == (2, 1, 2)
@@ -0,0 +1,57 @@
+from css_parser import iter_css_rules, parse_css
+
+
+def test_nested_media_and_supports_blocks():
+    css = """
+    @media screen and (min-width: 600px) {
+        @supports (display: grid) {
+            @media (orientation: landscape) { .grid { display: grid; } }
+        }
+        .nav { display: flex; }
+    }
+    .footer { color: gray; }
+    """
+    at_rule_counts = {}
+    rules = list(iter_css_rules(css, at_rule_counts))
+
+    assert [rule["selector"] for rule in rules] == [".grid", ".nav", ".footer"]
+    assert rules[0]["media"] == "screen and (min-width: 600px) and (orientation: landscape)"
+    assert rules[0]["at_rules"] == [
+        "@media screen and (min-width: 600px)",
+        "@supports (display: grid)",
+        "@media (orientation: landscape)",
+    ]
+    assert (rules[1]["media"], rules[1]["at_rules"]) == ("screen and (min-width: 600px)", ["@media screen and (min-width: 600px)"])
+    assert (rules[2]["media"], rules[2]["at_rules"]) == (None, [])
+    assert at_rule_counts == {"media": 2, "supports": 1}
+
+
+def test_comments_are_dropped():
+    css = "/* .hidden { color: red } */ p { margin: 0 /* reset */; color: /* c */ blue } /* unterminated"
+    assert parse_css(css) == [
+        {"selector": "p", "properties": {"margin": "0", "color": "blue"}, "media": None, "at_rules": []}
+    ]
+
+
+def test_braces_and_semicolons_inside_strings_and_urls_are_text():
+    css = """
+    .quote::before { content: "}{"; quotes: '{;}' '}'; }
+    .icon { background: url(data:image/png;base64,AA==) no-repeat; }
+    .after { color: red; }
+    """
+    rules = parse_css(css)
+
+    assert [rule["selector"] for rule in rules] == [".quote::before", ".icon", ".after"]
+    assert rules[0]["properties"] == {"content": '"}{"', "quotes": "'{;}' '}'"}
+    assert rules[1]["properties"] == {"background": "url(data:image/png;base64,AA==) no-repeat"}
+
+
+def test_blocks_without_style_rules_are_skipped():
+    css = """
+    @font-face { font-family: Brand; src: url(brand.woff2); }
+    @keyframes spin { from { transform: rotate(0); } to { transform: rotate(360deg); } }
+    .card { padding: 4px; &:hover { padding: 8px; } }
+    """
+    assert parse_css(css) == [
+        {"selector": ".card", "properties": {"padding": "4px"}, "media": None, "at_rules": []}
+    ]
@@ -0,0 +1,34 @@
+from itertools import permutations
+
+from css_vars import INVALID, VarResolver
+
+
+def test_two_variable_cycle_is_invalid():
+    resolver = VarResolver({"--a": "var(--b)", "--b": "var(--a)"})
+
+    assert resolver.table == {"--a": INVALID, "--b": INVALID}
+    assert resolver.resolve_value("1px solid var(--a)") == INVALID
+
+
+def test_fallback_applies_to_undefined_and_invalid_properties():
+    resolver = VarResolver({"--a": "var(--b)", "--b": "var(--a)", "--brand": "#123456"})
+
+    assert resolver.resolve_value("var(--missing, red)") == "red"
+    assert resolver.resolve_value("var(--a, blue)") == "blue"
+    assert resolver.resolve_value("var(--missing, var(--brand))") == "#123456"
+    assert resolver.resolve_value("0 0 4px var(--brand)") == "0 0 4px #123456"
+    assert resolver.resolve_value("var(--missing)") == INVALID
+
+
+def test_three_variable_cycle_with_a_fallback_is_invalid_in_any_order():
+    declarations = {
+        "--a": "var(--b)",
+        "--b": "var(--c)",
+        "--c": "var(--a, red)",
+        "--outside": "var(--a, blue)",
+        "--uses-cycle": "var(--c) 1px",
+    }
+    expected = {"--a": INVALID, "--b": INVALID, "--c": INVALID, "--outside": "blue", "--uses-cycle": INVALID}
+
+    for order in permutations(declarations):
+        assert VarResolver({name: declarations[name] for name in order}).table == expected
@@ -0,0 +1,32 @@
+import datetime
+from types import SimpleNamespace
+
+import config
+from freshness import is_stale, ttl_for_url
+
+DOMAIN_TTLS = {"example.com": 3600, "news.example.com": 60}
+
+
+def test_most_specific_domain_ttl_wins(monkeypatch):
+    monkeypatch.setattr(config, "SCRAPE_DOMAIN_TTLS", DOMAIN_TTLS)
+    monkeypatch.setattr(config, "SCRAPE_TTL_SECONDS", 86400)
+
+    assert ttl_for_url("https://news.example.com/today") == 60
+    assert ttl_for_url("https://live.news.example.com/") == 60
+    assert ttl_for_url("https://www.example.com/about") == 3600
+    assert ttl_for_url("https://EXAMPLE.com:8443/") == 3600
+    assert ttl_for_url("https://example.org/") == 86400
+    assert ttl_for_url("https://notexample.com/") == 86400
+
+
+def test_staleness_uses_the_domain_ttl(monkeypatch):
+    monkeypatch.setattr(config, "SCRAPE_DOMAIN_TTLS", DOMAIN_TTLS)
+    now = datetime.datetime(2024, 1, 1, 12, 0, 0)
+    ten_minutes_ago = now - datetime.timedelta(minutes=10)
+
+    def page(url, fetched_at):
+        return SimpleNamespace(url=url, fetched_at=fetched_at, created_at=None)
+
+    assert is_stale(page("https://news.example.com/", ten_minutes_ago), now)
+    assert not is_stale(page("https://www.example.com/", ten_minutes_ago), now)
+    assert is_stale(page("https://www.example.com/", None), now)
@@ -0,0 +1,77 @@
+import asyncio
+import datetime
+from collections import Counter
+
+import jobs
+from database import Job, SessionLocal
+from jobs import JobScheduler
+
+TIMEOUT = 60
+
+
+def _add_job(status=jobs.QUEUED, started_at=None):
+    db = SessionLocal()
+    try:
+        job = jobs._insert_job(db, "https://example.com/", None, None, ["seo_grading"])
+        if status != jobs.QUEUED:
+            db.query(Job).filter(Job.id == job["job_id"]).update({"status": status, "started_at": started_at})
+            db.commit()
+        return job["job_id"]
+    finally:
+        db.close()
+
+
+def _load(job_id):
+    db = SessionLocal()
+    try:
+        return jobs._load_job(db, job_id)
+    finally:
+        db.close()
+
+
+def test_two_schedulers_run_each_job_once():
+    now = datetime.datetime.utcnow()
+    queued = [_add_job() for _ in range(6)]
+    abandoned = _add_job(jobs.RUNNING, now - datetime.timedelta(seconds=2 * TIMEOUT))
+    in_progress = _add_job(jobs.RUNNING, now)
+    runs = Counter()
+
+    async def runner(job):
+        runs[job["job_id"]] += 1
+        await asyncio.sleep(0.01)
+        return {"ran": job["job_id"]}
+
+    async def run_both():
+        # Two server processes sharing one database, both restarted at once
+        schedulers = [JobScheduler(runner, workers=3, timeout=TIMEOUT) for _ in range(2)]
+        for scheduler in schedulers:
+            await scheduler.start()
+        await asyncio.gather(*(scheduler._queue.join() for scheduler in schedulers))
+        for scheduler in schedulers:
+            await scheduler.stop()
+
+    asyncio.run(run_both())
+
+    assert runs == Counter({job_id: 1 for job_id in queued + [abandoned]})
+    for job_id in queued + [abandoned]:
+        job = _load(job_id)
+        assert (job["status"], job["result"]) == (jobs.DONE, {"ran": job_id})
+    assert _load(in_progress)["status"] == jobs.RUNNING
+
+
+def test_a_reclaimed_job_keeps_the_newer_outcome():
+    job_id = _add_job()
+    db = SessionLocal()
+    try:
+        stale_before = datetime.datetime.utcnow()
+        first = jobs._claim_job(db, job_id, stale_before)
+        assert jobs._claim_job(db, job_id, stale_before) is None
+        # The first runner is presumed dead and the job is claimed again
+        second = jobs._claim_job(db, job_id, datetime.datetime.utcnow() + datetime.timedelta(seconds=1))
+        assert second is not None
+        jobs._finish_job(db, job_id, jobs.DONE, {"run": 2}, None, second["started_at"])
+        jobs._finish_job(db, job_id, jobs.FAILED, None, "late", first["started_at"])
+    finally:
+        db.close()
+    job = _load(job_id)
+    assert (job["status"], job["result"]) == (jobs.DONE, {"run": 2})
@@ -0,0 +1,62 @@
+import asyncio
+from collections import Counter
+
+from aiohttp import web
+
+import http_client
+from link_checker import LinkChecker, LinkStatusCache
+
+
+async def _check_links(paths, cache=None):
+    requests = Counter()
+
+    async def handler(request):
+        requests[request.method, request.path] += 1
+        if request.path == "/no-head" and request.method == "HEAD":
+            return web.Response(status=405)
+        if request.path == "/gone":
+            return web.Response(status=404)
+        return web.Response(text="ok")
+
+    app = web.Application()
+    app.router.add_route("*", "/{name}", handler)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    try:
+        checker = LinkChecker(cache=cache)
+        results = await checker.check_all([f"http://127.0.0.1:{port}{path}" for path in paths])
+    finally:
+        await http_client.close_async_session()
+        await runner.cleanup()
+    return [(result["url"].split(str(port))[1], result["status"]) for result in results], requests
+
+
+def test_duplicate_urls_are_checked_once():
+    results, requests = asyncio.run(_check_links(["/a", "/b", "/a", "/a"]))
+
+    assert results == [("/a", 200), ("/b", 200)]
+    assert requests == Counter({("HEAD", "/a"): 1, ("HEAD", "/b"): 1})
+
+
+def test_head_answering_400_or_more_falls_back_to_get():
+    results, requests = asyncio.run(_check_links(["/no-head", "/gone", "/ok"]))
+
+    assert results == [("/no-head", 200), ("/gone", 404), ("/ok", 200)]
+    assert requests == Counter({
+        ("HEAD", "/no-head"): 1, ("GET", "/no-head"): 1,
+        ("HEAD", "/gone"): 1, ("GET", "/gone"): 1,
+        ("HEAD", "/ok"): 1,
+    })
+
+
+def test_only_definitive_statuses_keep_the_full_ttl():
+    cache = LinkStatusCache(ttl=3600, transient_ttl=0)
+    for url, status in [("/ok", 200), ("/moved", 301), ("/gone", 404), ("/removed", 410), ("/busy", 429), ("/down", 503)]:
+        cache.put(url, {"url": url, "status": status, "message": ""})
+
+    assert [url for url in ("/ok", "/moved", "/gone", "/removed", "/busy", "/down") if cache.get(url)] == [
+        "/ok", "/moved", "/gone", "/removed"
+    ]
@@ -0,0 +1,42 @@
+from bs4 import BeautifulSoup
+
+from rule_index import RuleIndex
+
+HTML = """
+<html><body>
+  <div id="main" class="card wide"><a class="btn" href="/">Go</a></div>
+  <p>Text</p>
+</body></html>
+"""
+
+RULES = [
+    {"selector": ":root", "properties": {"--brand": "blue"}},
+    {"selector": "*", "properties": {"box-sizing": "border-box"}},
+    {"selector": "div.card", "properties": {"padding": "4px"}},
+    {"selector": "#main", "properties": {"margin": "0"}},
+    {"selector": "p, .wide", "properties": {"color": "gray"}},
+    {"selector": "nav > a.btn:hover", "properties": {"color": "red"}},
+    {"selector": "span.card", "properties": {"display": "none"}},
+    {"selector": "#other.card", "properties": {"display": "none"}},
+    {"selector": ".card.missing", "properties": {"display": "none"}},
+    {"selector": "DIV", "properties": {"display": "block"}},
+]
+
+
+def _selectors(index, element):
+    return [rule["selector"] for rule in index.matching_rules(element)]
+
+
+def test_rules_match_by_id_class_tag_and_universal_in_stylesheet_order():
+    soup = BeautifulSoup(HTML, "html.parser")
+    index = RuleIndex(RULES)
+
+    assert _selectors(index, soup.find(id="main")) == ["*", "div.card", "#main", "p, .wide", "DIV"]
+    assert _selectors(index, soup.find("a")) == ["*", "nav > a.btn:hover"]
+    assert _selectors(index, soup.find("p")) == ["*", "p, .wide"]
+
+
+def test_root_matches_the_html_element():
+    soup = BeautifulSoup(HTML, "html.parser")
+
+    assert _selectors(RuleIndex(RULES), soup.find("html")) == [":root", "*"]
@@ -0,0 +1,56 @@
+import datetime
+import threading
+
+from database import SessionLocal, Stylesheet, StylesheetRecord
+from stylesheet_store import StylesheetStore
+
+SCRAPES = 6
+
+
+def test_concurrent_scrapes_store_a_shared_stylesheet_once():
+    css = ".site-header { color: #123456; }"
+    url = "https://example.com/site.css"
+    # Every session looks the stylesheet up before any of them writes it
+    looked_up = threading.Barrier(SCRAPES)
+    errors = []
+
+    def scrape(i):
+        db = SessionLocal()
+        try:
+            store = StylesheetStore(db)
+            sheet_hash = store.add(css)
+            looked_up.wait()
+            store.flush()
+            store.save_records([{"url": url, "etag": f'"v{i}"', "last_modified": None}], [sheet_hash], datetime.datetime.utcnow())
+            db.commit()
+        except Exception as e:
+            errors.append(e)
+        finally:
+            db.close()
+
+    threads = [threading.Thread(target=scrape, args=(i,)) for i in range(SCRAPES)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    db = SessionLocal()
+    try:
+        assert db.query(Stylesheet).count() == 1
+        records = db.query(StylesheetRecord).all()
+        assert [record.url for record in records] == [url]
+        assert records[0].content_hash == db.query(Stylesheet).one().content_hash
+    finally:
+        db.close()
+
+
+def test_failed_downloads_are_not_recorded():
+    db = SessionLocal()
+    try:
+        store = StylesheetStore(db)
+        store.save_records([{"url": "https://example.com/missing.css", "css": "", "error": "HTTP 404"}], [None], datetime.datetime.utcnow())
+        db.commit()
+        assert db.query(StylesheetRecord).filter(StylesheetRecord.url == "https://example.com/missing.css").count() == 0
+    finally:
+        db.close()
@@ -0,0 +1,50 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Hashable, Optional
+
+
+class TTLCache:
+    """Bounded map whose entries expire, safe to share between threads
+
+    Entries expire ``ttl`` seconds after they were written (``put`` can give
+    one entry its own TTL) and the least recently written ones are dropped
+    beyond ``max_entries``, so a long-running server never grows it without
+    limit. Expired entries are dropped when they are next read.
+    """
+
+    def __init__(self, ttl: float, max_entries: int):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        # Used from the server loop, the I/O pool and the background loop of http_client
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable, default=None):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return default
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                return default
+            return value
+
+    def put(self, key: Hashable, value, ttl: Optional[float] = None):
+        ttl = self.ttl if ttl is None else ttl
+        if ttl <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        with self._lock:
+            return len(self._entries)
@@ -1,9 +1,10 @@
-import requests
-from bs4 import BeautifulSoup
+from page_features import as_features
 from urllib.parse import urlparse, urljoin
 import ssl
 import socket
-import re
+import threading
+import config
+from ttl_cache import TTLCache
 
 def is_https(url):
     return urlparse(url).scheme == 'https'
@@ -11,56 +12,64 @@ def is_https(url):
 def check_ssl_certificate(domain):
     try:
         context = ssl.create_default_context()
-        with socket.create_connection((domain, 443)) as sock:
+        with socket.create_connection((domain, 443), timeout=config.HTTP_TIMEOUT) as sock:
             with context.wrap_socket(sock, server_hostname=domain) as ssock:
                 certificate = ssock.getpeercert()
                 return True
     except Exception as e:
         return False
 
-def extract_contact_info(soup):
-    emails = set()
-    phones = set()
+# Probe results per domain, so pages of one site share a single TLS handshake
+_ssl_status = TTLCache(config.SSL_PROBE_TTL, config.SSL_PROBE_CACHE_SIZE)  # domain -> valid
+_ssl_locks = {}  # domain -> [lock, callers holding or waiting for it], only while a probe runs
+_ssl_lock = threading.Lock()
 
-    for text in soup.stripped_strings:
-        if re.search(r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b', text):
-            emails.add(text)
-
-    for text in soup.stripped_strings:
-        phones_found = re.findall(r'\+?\d[\d -]{8,}\d', text)
-        phones.update(phones_found)
-
-    return emails, phones
-
-def find_policy_links(soup):
+def cached_ssl_certificate(domain):
+    with _ssl_lock:
+        domain_lock = _ssl_locks.setdefault(domain, [threading.Lock(), 0])
+        domain_lock[1] += 1
+    try:
+        with domain_lock[0]:
+            valid = _ssl_status.get(domain)
+            if valid is None:
+                valid = check_ssl_certificate(domain)
+                _ssl_status.put(domain, valid)
+            return valid
+    finally:
+        with _ssl_lock:
+            domain_lock[1] -= 1
+            if not domain_lock[1]:
+                del _ssl_locks[domain]
+
+# The helpers below accept raw HTML, a parsed tree or a page feature record
+def extract_contact_info(document):
+    features = as_features(document)
+    return set(features["emails"]), set(features["phones"])
+
+def find_policy_links(document, base_url=''):
     policy_links = []
-    for a in soup.find_all('a', href=True):
-        href = a['href']
+    for href in as_features(document)["links"]:
         if 'privacy' in href.lower() or 'policy' in href.lower():
-            policy_links.append(urljoin(url, href))
+            policy_links.append(urljoin(base_url, href))
 
     return policy_links
 
-def find_login_signup_links(soup):
+def find_login_signup_links(document, base_url=''):
     login_signup_links = []
-    for a in soup.find_all('a', href=True):
-        href = a['href']
+    for href in as_features(document)["links"]:
         if 'login' in href.lower() or 'signup' in href.lower() or 'register' in href.lower():
-            login_signup_links.append(urljoin(url, href))
+            login_signup_links.append(urljoin(base_url, href))
 
     return login_signup_links
 
-def analyze_login_form(html_content, base_url):
-    soup = BeautifulSoup(html_content, 'html.parser')
-    input_details = []
+def analyze_login_form(document, base_url):
+    features = as_features(document)
 
-    # Find input fields
-    inputs = soup.find_all('input')
-    for input_field in inputs:
-        input_details.append({"name": input_field.get('name'), "type": input_field.get('type')})
+    # Input fields
+    input_details = [dict(input_field) for input_field in features["inputs"]]
 
     # Check for CAPTCHA
-    captcha_present = bool(soup.find('div', {'class': 'g-recaptcha'}))
+    captcha_present = features["captcha_present"]
 
     return {"input_details": input_details, "captcha_present": captcha_present}
 
@@ -139,19 +148,19 @@ def review_http_headers(response):
         security_headers_info[header] = header in headers
 
     return security_headers_info
-def scrape_payment_elements(html_content, base_url):
-    soup = BeautifulSoup(html_content, 'html.parser')
+def scrape_payment_elements(document, base_url):
+    features = as_features(document)
 
-    emails, phones = extract_contact_info(soup)
-    policy_links = find_policy_links(soup)
-    login_signup_links = find_login_signup_links(soup)
-    forms = soup.find_all('form')
-    scripts = soup.find_all('script')
+    emails, phones = extract_contact_info(features)
+    policy_links = find_policy_links(features, base_url)
+    login_signup_links = find_login_signup_links(features, base_url)
+    forms = features["forms"]
+    scripts = features["scripts"]
 
     payment_security = []
 
     for form in forms:
-        form_action = form.get('action')
+        form_action = form['action']
         if form_action:
             full_url = urljoin(base_url, form_action)
             payment_security.append({
@@ -159,17 +168,17 @@ def scrape_payment_elements(html_content, base_url):
                 "secured": is_https(full_url)
             })
 
-            input_fields = form.find_all('input')
+            input_fields = form['inputs']
             for field in input_fields:
-                if field.get('type') in ['text', 'password', 'number']:
-                    if 'card' in field.get('name', '').lower() or 'cvv' in field.get('name', '').lower():
+                if field['type'] in ['text', 'password', 'number']:
+                    name = field['name'] or ''
+                    if 'card' in name.lower() or 'cvv' in name.lower():
                         payment_security.append({
-                            "sensitive_input_field": field.get('name'),
+                            "sensitive_input_field": field['name'],
                             "form_action": full_url
                         })
 
-    for script in scripts:
-        script_src = script.get('src')
+    for script_src in scripts:
         if script_src:
             full_script_url = urljoin(base_url, script_src)
             payment_security.append({
@@ -178,7 +187,7 @@ def scrape_payment_elements(html_content, base_url):
             })
 
     # Analyze login form
-    login_form_results = analyze_login_form(html_content, base_url)
+    login_form_results = analyze_login_form(features, base_url)
 
     return {
         "emails": list(emails),
@@ -190,26 +199,21 @@ def scrape_payment_elements(html_content, base_url):
     }
 
 
-def web_security_report(html_content, base_url, session=None, username=None, password=None, protected_url=None):
-    soup = BeautifulSoup(html_content, 'html.parser')
+def web_security_report(document, base_url, session=None, username=None, password=None, protected_url=None):
+    features = as_features(document)
 
     # Check if the website is HTTPS
     domain = urlparse(base_url).netloc
     https_status = is_https(base_url)
-    ssl_status = check_ssl_certificate(domain)
-
-    # Extract contact info
-    emails, phones = extract_contact_info(soup)
-
-    # Find policy links and login/signup links
-    policy_links = find_policy_links(soup)
-    login_signup_links = find_login_signup_links(soup)
-
-    # Scrape payment elements
-    payment_security = scrape_payment_elements(html_content, base_url)
-
-    # Analyze login form
-    login_form_results = analyze_login_form(html_content, base_url)
+    ssl_status = cached_ssl_certificate(domain)
+
+    # Scrape payment elements; this also collects contact info, policy and
+    # login/signup links and the login form analysis from the same tree
+    payment_security = scrape_payment_elements(features, base_url)
+    emails, phones = set(payment_security["emails"]), set(payment_security["phones"])
+    policy_links = payment_security["policy_links"]
+    login_signup_links = payment_security["login_signup_links"]
+    login_form_results = payment_security["login_form_analysis"]
 
     # Session management and authorization checks
     cookies_info, jwt_used = {}, False